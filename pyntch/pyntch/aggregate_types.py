@@ -155,8 +155,8 @@ class ListObject(BuiltinSequenceObject):
         self.frame = frame
         self.anchor = anchor
         self.target = target
-        self.received_fkey = set()
-        self.received_fcmp = set()
+        self.consumed_fkey = 0
+        self.consumed_fcmp = 0
         self.key = CompoundTypeNode()
         CompoundTypeNode.__init__(self)
         if fkey:
@@ -168,9 +168,9 @@ class ListObject(BuiltinSequenceObject):
         return
       
       def recv_fkey(self, src):
-        for obj in src:
-          if obj in self.received_fkey: continue
-          self.received_fkey.add(obj)
+        objs = src.get_types(self.consumed_fkey)
+        self.consumed_fkey += len(objs)
+        for obj in objs:
           try:
             obj.call(self.frame, self.anchor, (self.target.elemall,), {}).connect(self.key.recv)
           except NodeTypeError:
@@ -178,9 +178,9 @@ class ListObject(BuiltinSequenceObject):
         return
       
       def recv_fcmp(self, src):
-        for obj in src:
-          if obj in self.received_fcmp: continue
-          self.received_fcmp.add(obj)
+        objs = src.get_types(self.consumed_fcmp)
+        self.consumed_fcmp += len(objs)
+        for obj in objs:
           try:
             checker = TypeChecker(self.frame, IntType.get_typeobj(),
                                   'the return value of comparison function')
@@ -649,7 +649,7 @@ class ReversedType(BuiltinCallable, IterType):
       self.frame = frame
       self.anchor = anchor
       self.target = target
-      self.received = set()
+      self.consumed = 0
       CompoundTypeNode.__init__(self)
       target.connect(self.recv_target)
       return
@@ -658,9 +658,9 @@ class ReversedType(BuiltinCallable, IterType):
       return 'reversed(%r)' % self.target
     
     def recv_target(self, src):
-      for obj in src:
-        if obj in self.received: continue
-        self.received.add(obj)
+      objs = src.get_types(self.consumed)
+      self.consumed += len(objs)
+      for obj in objs:
         try:
           iterobj = obj.get_reversed(self.frame, self.anchor)
           frame1 = ExceptionCatcher(self.frame)
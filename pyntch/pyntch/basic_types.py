@@ -27,6 +27,57 @@ class BuiltinBasicType(BuiltinType):
       klass.OBJECTS[klass] = klass.TYPE_INSTANCE(klass.get_typeobj())
     return klass.OBJECTS[klass]
 
+  # METHODS: a table of builtin methods.
+  #   name -> (fullname, retval, args, optargs, expts[, methodclass])
+  # retval is either a type, 'self', a tuple of them (a tuple object)
+  # or a list of one of them (a new list object for each call).
+  # expts is a list of ErrorConfig methods.
+  METHODS = {}
+
+  # get_method(name)
+  #   returns a method object in the table. The object is created
+  #   once for each type and shared by all the call sites.
+  #   (Arguments are checked at each call.)
+  def get_method(self, name):
+    if 'methods' not in self.__dict__:
+      self.methods = {}
+    if name not in self.methods:
+      self.methods[name] = self.create_method(*self.METHODS[name])
+    return self.methods[name]
+
+  def create_method(self, fullname, retval, args=None, optargs=None, expts=None,
+                    methodclass=BuiltinConstMethod):
+    from pyntch.aggregate_types import TupleType
+    def get_retobj(x):
+      if x == 'self':
+        return self.get_object()
+      elif isinstance(x, tuple):
+        return TupleType.create_tuple([ get_retobj(y) for y in x ])
+      else:
+        return x.get_object()
+    expts = [ expt() for expt in (expts or []) ]
+    if isinstance(retval, list):
+      (retval,) = retval
+      return BuiltinListMethod(fullname, get_retobj(retval), args, optargs, expts)
+    return methodclass(fullname, get_retobj(retval), args, optargs, expts)
+
+
+##  BuiltinListMethod
+##
+##  A method that returns a new list for each call.
+##
+class BuiltinListMethod(BuiltinConstMethod):
+
+  def __init__(self, name, elemall, args=None, optargs=None, expts=None):
+    self.elemall = elemall
+    BuiltinConstMethod.__init__(self, name, None, args=args, optargs=optargs, expts=expts)
+    return
+
+  def process_args(self, frame, anchor, args, kwargs):
+    from pyntch.aggregate_types import ListType
+    BuiltinConstMethod.process_args(self, frame, anchor, args, kwargs)
+    return ListType.create_list(self.elemall)
+
 
 ##  TypeType
 ##
@@ -55,14 +106,14 @@ class NumberType(BuiltinBasicType):
     
     def __init__(self, frame, value):
       self.frame = frame
-      self.received = set()
+      self.consumed = 0
       CompoundTypeNode.__init__(self, [value])
       return
     
     def recv(self, src):
-      for obj in src:
-        if obj in self.received: continue
-        self.received.add(obj)
+      objs = src.get_types(self.consumed)
+      self.consumed += len(objs)
+      for obj in objs:
         if obj.is_type(BaseStringType.get_typeobj()):
           self.frame.raise_expt(ErrorConfig.MaybeNotConvertable(self.TYPE_NAME))
         elif obj.is_type(SimpleNumberType.get_typeobj(), BoolType.get_typeobj()):
@@ -161,110 +212,9 @@ class BaseStringType(BuiltinConstCallable, BuiltinBasicType):
   TYPE_NAME = 'basestring'
 
   def get_attr(self, frame, anchor, name, write=False):
-    from pyntch.aggregate_types import TupleType, ListType
     if write: raise NodeAssignError(name)
-    if name == 'capitalize':
-      return BuiltinConstMethod('str.capitalize', self.get_object())
-    elif name == 'center':
-      return BuiltinConstMethod('str.center', self.get_object(),
-                                [IntType], [BaseStringType])
-    elif name == 'count':
-      return BuiltinConstMethod('str.count', IntType.get_object(),
-                                [BaseStringType], [IntType, IntType])
-    elif name == 'decode':
-      return BuiltinConstMethod('str.decode', UnicodeType.get_object(),
-                                [], [BaseStringType, BaseStringType],
-                                [ErrorConfig.MaybeNotDecodable()])
-    elif name == 'encode':
-      return BuiltinConstMethod('str.encode', StrType.get_object(),
-                                [], [BaseStringType, BaseStringType],
-                                [ErrorConfig.MaybeNotEncodable()])
-    elif name == 'endswith':
-      return BuiltinConstMethod('str.endswith', BoolType.get_object(),
-                                [BaseStringType], [IntType, IntType])
-    elif name == 'expandtabs':
-      return BuiltinConstMethod('str.expandtabs', self.get_object(),
-                                [], [IntType])
-    elif name == 'find':
-      return BuiltinConstMethod('str.find', IntType.get_object(),
-                                [BaseStringType], [IntType, IntType])
-    elif name == 'index':
-      return BuiltinConstMethod('str.index', IntType.get_object(),
-                                [BaseStringType], [IntType, IntType],
-                                [ErrorConfig.MaybeSubstringNotFound()])
-    elif name == 'isalnum':
-      return BuiltinConstMethod('str.isalnum', BoolType.get_object())
-    elif name == 'isalpha':
-      return BuiltinConstMethod('str.isalpha', BoolType.get_object())
-    elif name == 'isdigit':
-      return BuiltinConstMethod('str.isdigit', BoolType.get_object())
-    elif name == 'islower':
-      return BuiltinConstMethod('str.islower', BoolType.get_object())
-    elif name == 'isspace':
-      return BuiltinConstMethod('str.isspace', BoolType.get_object())
-    elif name == 'istitle':
-      return BuiltinConstMethod('str.istitle', BoolType.get_object())
-    elif name == 'isupper':
-      return BuiltinConstMethod('str.isupper', BoolType.get_object())
-    elif name == 'join':
-      return BuiltinConstMethod('str.join', self.get_object(),
-                                [[BaseStringType]])
-    elif name == 'ljust':
-      return BuiltinConstMethod('str.ljust', self.get_object(),
-                                [IntType], [BaseStringType])
-    elif name == 'lower':
-      return BuiltinConstMethod('str.lower', self.get_object())
-    elif name == 'lstrip':
-      return BuiltinConstMethod('str.lstrip', self.get_object(),
-                                [], [BaseStringType])
-    elif name == 'partition':
-      return BuiltinConstMethod('str.partiion',
-                                TupleType.create_tuple([self.get_object(), self.get_object(), self.get_object()]),
-                                [BaseStringType])
-    elif name == 'replace':
-      return BuiltinConstMethod('str.replace', self.get_object(),
-                                [BaseStringType, BaseStringType], [IntType])
-    elif name == 'rfind':
-      return BuiltinConstMethod('str.rfind', IntType.get_object(),
-                                [BaseStringType], [IntType, IntType])
-    elif name == 'rindex':
-      return BuiltinConstMethod('str.rindex', IntType.get_object(),
-                                [BaseStringType], [IntType, IntType],
-                                [ErrorConfig.MaybeSubstringNotFound()])
-    elif name == 'rjust':
-      return BuiltinConstMethod('str.rjust', self.get_object(),
-                                [IntType], [BaseStringType])
-    elif name == 'rpartition':
-      return BuiltinConstMethod('str.rpartiion',
-                                TupleType.create_tuple([self.get_object(), self.get_object(), self.get_object()]),
-                                [BaseStringType])
-    elif name == 'rsplit':
-      return BuiltinConstMethod('str.rsplit', ListType.create_list(self.get_object()),
-                                [], [BaseStringType, IntType])
-    elif name == 'rstrip':
-      return BuiltinConstMethod('str.rstrip', self.get_object(),
-                                [], [BaseStringType])
-    elif name == 'split':
-      return BuiltinConstMethod('str.split', ListType.create_list(self.get_object()),
-                                [], [BaseStringType, IntType])
-    elif name == 'splitlines':
-      return BuiltinConstMethod('str.splitlines', ListType.create_list(self.get_object()),
-                                [], [ANY])
-    elif name == 'startswith':
-      return BuiltinConstMethod('str.startswith', BoolType.get_object(),
-                                [BaseStringType], [IntType, IntType])
-    elif name == 'strip':
-      return BuiltinConstMethod('str.strip', self.get_object(),
-                                [], [BaseStringType])
-    elif name == 'swapcase':
-      return BuiltinConstMethod('str.swapcase', self.get_object())
-    elif name == 'title':
-      return BuiltinConstMethod('str.title', self.get_object())
-    elif name == 'upper':
-      return BuiltinConstMethod('str.upper', self.get_object())
-    elif name == 'zfill':
-      return BuiltinConstMethod('str.zfill', self.get_object(),
-                                [IntType])
+    if name in self.METHODS:
+      return self.get_method(name)
     raise NodeAttrError(name)
 
   class StrConverter(CompoundTypeNode):
@@ -272,15 +222,15 @@ class BaseStringType(BuiltinConstCallable, BuiltinBasicType):
     def __init__(self, frame, anchor, value):
       self.frame = frame
       self.anchor = anchor
-      self.received = set()
+      self.consumed = 0
       CompoundTypeNode.__init__(self, [value])
       return
     
     def recv(self, src):
       from pyntch.expression import OptMethodCall
-      for obj in src:
-        if obj in self.received: continue
-        self.received.add(obj)
+      objs = src.get_types(self.consumed)
+      self.consumed += len(objs)
+      for obj in objs:
         if isinstance(obj, InstanceObject):
           value = OptMethodCall(self.frame, self.anchor, obj, '__str__')
           checker = TypeChecker(self.frame, BaseStringType.get_typeobj(), 
@@ -313,14 +263,6 @@ class StrType(BaseStringType):
   TYPE_NAME = 'str'
   TYPE_INSTANCE = StrObject
   
-  def get_attr(self, frame, anchor, name, write=False):
-    if write: raise NodeAssignError(name)
-    if name == 'translate':
-      return BuiltinConstMethod('str.translate', self.get_object(),
-                                [BaseStringType], [BaseStringType],
-                                [ErrorConfig.MaybeTableInvalid()])
-    return BaseStringType.get_attr(self, frame, anchor, name, write=write)
-    
   def __init__(self):
     BuiltinBasicType.__init__(self)
     BuiltinConstCallable.__init__(self, 'str', self.get_object(), [], [ANY])
@@ -339,21 +281,66 @@ class UnicodeType(BaseStringType):
       arg1.connect(checker.recv)
       return
 
-  def get_attr(self, frame, anchor, name, write=False):
-    if write: raise NodeAssignError(name)
-    if name == 'isdecimal':
-      return BuiltinConstMethod('unicode.isdecimal', BoolType.get_object())
-    elif name == 'isnumeric':
-      return BuiltinConstMethod('unicode.isnumeric', BoolType.get_object())
-    elif name == 'translate':
-      return self.TranslateFunc('unicode.translate', self.get_object(),
-                                [ANY])
-    return BaseStringType.get_attr(self, frame, anchor, name, write=write)
-
   def __init__(self):
     BuiltinBasicType.__init__(self)
     BuiltinConstCallable.__init__(self, 'unicode', self.get_object(), [], [ANY, StrType, StrType])
     return
+
+BaseStringType.METHODS = {
+  'capitalize': ('str.capitalize', 'self'),
+  'center': ('str.center', 'self', [IntType], [BaseStringType]),
+  'count': ('str.count', IntType, [BaseStringType], [IntType, IntType]),
+  'decode': ('str.decode', UnicodeType, [], [BaseStringType, BaseStringType],
+             [ErrorConfig.MaybeNotDecodable]),
+  'encode': ('str.encode', StrType, [], [BaseStringType, BaseStringType],
+             [ErrorConfig.MaybeNotEncodable]),
+  'endswith': ('str.endswith', BoolType, [BaseStringType], [IntType, IntType]),
+  'expandtabs': ('str.expandtabs', 'self', [], [IntType]),
+  'find': ('str.find', IntType, [BaseStringType], [IntType, IntType]),
+  'index': ('str.index', IntType, [BaseStringType], [IntType, IntType],
+            [ErrorConfig.MaybeSubstringNotFound]),
+  'isalnum': ('str.isalnum', BoolType),
+  'isalpha': ('str.isalpha', BoolType),
+  'isdigit': ('str.isdigit', BoolType),
+  'islower': ('str.islower', BoolType),
+  'isspace': ('str.isspace', BoolType),
+  'istitle': ('str.istitle', BoolType),
+  'isupper': ('str.isupper', BoolType),
+  'join': ('str.join', 'self', [[BaseStringType]]),
+  'ljust': ('str.ljust', 'self', [IntType], [BaseStringType]),
+  'lower': ('str.lower', 'self'),
+  'lstrip': ('str.lstrip', 'self', [], [BaseStringType]),
+  'partition': ('str.partiion', ('self', 'self', 'self'), [BaseStringType]),
+  'replace': ('str.replace', 'self', [BaseStringType, BaseStringType], [IntType]),
+  'rfind': ('str.rfind', IntType, [BaseStringType], [IntType, IntType]),
+  'rindex': ('str.rindex', IntType, [BaseStringType], [IntType, IntType],
+             [ErrorConfig.MaybeSubstringNotFound]),
+  'rjust': ('str.rjust', 'self', [IntType], [BaseStringType]),
+  'rpartition': ('str.rpartiion', ('self', 'self', 'self'), [BaseStringType]),
+  'rsplit': ('str.rsplit', ['self'], [], [BaseStringType, IntType]),
+  'rstrip': ('str.rstrip', 'self', [], [BaseStringType]),
+  'split': ('str.split', ['self'], [], [BaseStringType, IntType]),
+  'splitlines': ('str.splitlines', ['self'], [], [ANY]),
+  'startswith': ('str.startswith', BoolType, [BaseStringType], [IntType, IntType]),
+  'strip': ('str.strip', 'self', [], [BaseStringType]),
+  'swapcase': ('str.swapcase', 'self'),
+  'title': ('str.title', 'self'),
+  'upper': ('str.upper', 'self'),
+  'zfill': ('str.zfill', 'self', [IntType]),
+  }
+
+StrType.METHODS = dict(BaseStringType.METHODS)
+StrType.METHODS.update({
+  'translate': ('str.translate', 'self', [BaseStringType], [BaseStringType],
+                [ErrorConfig.MaybeTableInvalid]),
+  })
+
+UnicodeType.METHODS = dict(BaseStringType.METHODS)
+UnicodeType.METHODS.update({
+  'isdecimal': ('unicode.isdecimal', BoolType),
+  'isnumeric': ('unicode.isnumeric', BoolType),
+  'translate': ('unicode.translate', 'self', [ANY], [], [], UnicodeType.TranslateFunc),
+  })
   
 
 ##  FileType
@@ -381,62 +368,41 @@ class FileType(BuiltinConstCallable, BuiltinBasicType):
     return
 
   def get_attr(self, frame, anchor, name, write=False):
-    from pyntch.aggregate_types import ListType
     if write: raise NodeAssignError(name)
-    if name == 'close':
-      return BuiltinConstMethod('file.close', NoneType.get_object())
+    if name in self.METHODS:
+      return self.get_method(name)
     elif name == 'closed':
       return BoolType.get_object()
     elif name == 'encoding':
       return StrType.get_object()
-    elif name == 'fileno':
-      return BuiltinConstMethod('file.fileno', IntType.get_object())
-    elif name == 'flush':
-      return BuiltinConstMethod('file.flush', NoneType.get_object())
-    elif name == 'isatty':
-      return BuiltinConstMethod('file.isatty', BoolType.get_object())
     elif name == 'mode':
       return StrType.get_object()
     elif name == 'name':
       return StrType.get_object()
     elif name == 'newlines':
       return NoneType.get_object()
-    elif name == 'next':
-      return BuiltinConstMethod('file.next', StrType.get_object())
-    elif name == 'read':
-      return BuiltinConstMethod('file.read', StrType.get_object(),
-                                [], [IntType],
-                                [ErrorConfig.MaybeEOFError()])
-    elif name == 'readline':
-      return BuiltinConstMethod('file.readline', StrType.get_object(),
-                                [], [IntType],
-                                [ErrorConfig.MaybeEOFError()])
-    elif name == 'readlines':
-      return BuiltinConstMethod('file.readlines', ListType.create_list(StrType.get_object()),
-                                [], [IntType],
-                                [ErrorConfig.MaybeEOFError()])
-    elif name == 'seek':
-      return BuiltinConstMethod('file.seek', NoneType.get_object(),
-                                [IntType], [IntType],
-                                [ErrorConfig.MaybeEOFError()])
     elif name == 'softspace':
       return IntType.get_object()
-    elif name == 'tell':
-      return BuiltinConstMethod('file.tell', IntType.get_object(),
-                                expts=[ErrorConfig.MaybeFileIllegalSeek()])
-    elif name == 'truncate':
-      return BuiltinConstMethod('file.truncate', NoneType.get_object(),
-                                [], [IntType])
-    elif name == 'write':
-      return BuiltinConstMethod('file.write', NoneType.get_object(),
-                                [BaseStringType])
-    elif name == 'writelines':
-      return BuiltinConstMethod('file.writestrings', NoneType.get_object(),
-                                [[BaseStringType]])
     elif name == 'xreadlines':
       return self
     raise NodeAttrError(name)
 
+FileType.METHODS = {
+  'close': ('file.close', NoneType),
+  'fileno': ('file.fileno', IntType),
+  'flush': ('file.flush', NoneType),
+  'isatty': ('file.isatty', BoolType),
+  'next': ('file.next', StrType),
+  'read': ('file.read', StrType, [], [IntType], [ErrorConfig.MaybeEOFError]),
+  'readline': ('file.readline', StrType, [], [IntType], [ErrorConfig.MaybeEOFError]),
+  'readlines': ('file.readlines', [StrType], [], [IntType], [ErrorConfig.MaybeEOFError]),
+  'seek': ('file.seek', NoneType, [IntType], [IntType], [ErrorConfig.MaybeEOFError]),
+  'tell': ('file.tell', IntType, [], [], [ErrorConfig.MaybeFileIllegalSeek]),
+  'truncate': ('file.truncate', NoneType, [], [IntType]),
+  'write': ('file.write', NoneType, [BaseStringType]),
+  'writelines': ('file.writestrings', NoneType, [[BaseStringType]]),
+  }
+
 
 ##  ObjectType
 ##
@@ -500,14 +466,14 @@ class StaticMethodType(BuiltinCallable, BuiltinType):
     def __init__(self, typeobj, wrapper, obj):
       self.typeobj = typeobj
       self.wrapper = wrapper
-      self.received = set()
+      self.consumed = 0
       CompoundTypeNode.__init__(self, [obj])
       return
     
     def recv(self, src):
-      for obj in src:
-        if obj in self.received: continue
-        self.received.add(obj)
+      objs = src.get_types(self.consumed)
+      self.consumed += len(objs)
+      for obj in objs:
         self.update_type(self.wrapper(self.typeobj, obj))
       return
 
@@ -213,16 +213,16 @@ class FilterFunc(BuiltinFuncNoKwd):
     def __init__(self, frame, anchor, func, seq):
       self.frame = frame
       self.anchor = anchor
-      self.received = set()
+      self.consumed = 0
       self.elem = IterElement(frame, anchor, seq)
       CompoundTypeNode.__init__(self, [seq])
       func.connect(self.recv_func)
       return
 
     def recv_func(self, src):
-      for obj in src:
-        if obj in self.received: continue
-        self.received.add(obj)
+      objs = src.get_types(self.consumed)
+      self.consumed += len(objs)
+      for obj in objs:
         if not isinstance(obj, NoneType):
           try:
             obj.call(self.frame, self.anchor, (self.elem,), {})
@@ -319,16 +319,17 @@ class LenFunc(BuiltinFuncNoKwd):
   class LengthChecker(MustBeDefinedNode):
     
     def __init__(self, frame, anchor, target):
-      self.received = set()
+      self.consumed = 0
       self.target = target
       MustBeDefinedNode.__init__(self, frame, anchor)
       self.target.connect(self.recv_target)
       return
 
     def recv_target(self, src):
-      for obj in src:
-        if obj in self.received: continue
-        self.received.add(obj)
+      objs = src.get_types(self.consumed)
+      self.consumed += len(objs)
+      for obj in objs:
+        self.schedule_check(self.check_undefined)
         try:
           obj.get_length(self.frame, self.anchor).connect(self.recv)
         except (NodeTypeError, NodeAttrError):
@@ -336,7 +337,7 @@ class LenFunc(BuiltinFuncNoKwd):
       return
 
     def check_undefined(self):
-      if not self.received: return
+      if not self.consumed: return
       if self.types: return
       self.raise_expt(ErrorConfig.NoLength(self.target))
       return
@@ -359,7 +360,7 @@ class MapFunc(BuiltinFunc):
     def __init__(self, frame, anchor, func, objs):
       self.frame = frame
       self.anchor = anchor
-      self.received = set()
+      self.consumed = 0
       self.args = tuple( IterElement(frame, anchor, obj) for obj in objs )
       self.listobj = ListType.create_list()
       CompoundTypeNode.__init__(self, [self.listobj])
@@ -367,9 +368,9 @@ class MapFunc(BuiltinFunc):
       return
 
     def recv_func(self, src):
-      for obj in src:
-        if obj in self.received: continue
-        self.received.add(obj)
+      objs = src.get_types(self.consumed)
+      self.consumed += len(objs)
+      for obj in objs:
         try:
           obj.call(self.frame, self.anchor, self.args, {}).connect(self.listobj.elemall.recv)
         except NodeTypeError:
@@ -486,7 +487,7 @@ class ReduceFunc(BuiltinFuncNoKwd):
     def __init__(self, frame, anchor, func, seq, initial):
       self.frame = frame
       self.anchor = anchor
-      self.received = set()
+      self.consumed = 0
       self.elem = IterElement(frame, anchor, seq)
       self.result = CompoundTypeNode()
       if initial:
@@ -499,9 +500,9 @@ class ReduceFunc(BuiltinFuncNoKwd):
       return
 
     def recv_func(self, src):
-      for obj in src:
-        if obj in self.received: continue
-        self.received.add(obj)
+      objs = src.get_types(self.consumed)
+      self.consumed += len(objs)
+      for obj in objs:
         try:
           result = obj.call(self.frame, self.anchor, self.args, {})
           result.connect(self.recv)
@@ -564,7 +565,7 @@ class SumFunc(BuiltinFuncNoKwd):
     def __init__(self, frame, anchor, seq, initial):
       self.frame = frame
       self.anchor = anchor
-      self.received = set()
+      self.consumed = 0
       self.elem = IterElement(frame, anchor, seq)
       self.result = CompoundTypeNode()
       if initial:
@@ -576,9 +577,9 @@ class SumFunc(BuiltinFuncNoKwd):
       return
 
     def recv_elem(self, src):
-      for obj in src:
-        if obj in self.received: continue
-        self.received.add(obj)
+      objs = src.get_types(self.consumed)
+      self.consumed += len(objs)
+      for obj in objs:
         BinaryOp(self.frame, self.anchor, 'Add', obj, self.result).connect(self.result.recv)
       return
   
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+##
+##  cache.py
+##
+##  A content-addressed cache of analysis reports.
+##
+
+import sys, os, os.path
+try:
+  from hashlib import sha1
+except ImportError:
+  from sha import new as sha1
+
+
+##  ResultCache
+##
+##  A report is stored under the digest of its whole input closure,
+##  i.e. the contents of every file that was loaded by the Interpreter
+##  plus the parameters of the run. Since the closure is not known
+##  until the files are parsed, an index file for each closure (named
+##  after the digests of the parameters and the closure) records which
+##  files were loaded. The same parameters can have several closures,
+##  e.g. in different checkouts. The warnings shown during the analysis
+##  are kept with the report.
+##
+##  <dir>/<paramdigest>.<closuredigest>.idx   list of (filedigest, path)
+##  <dir>/<closuredigest>.<format>            report
+##  <dir>/<closuredigest>.msg                 warnings
+##
+class ResultCache(object):
+
+  verbose = 0
+
+  def __init__(self, dirname, maxsize):
+    self.dirname = dirname
+    self.maxsize = maxsize
+    if not os.path.isdir(dirname):
+      os.makedirs(dirname)
+    return
+
+  def __repr__(self):
+    return '<ResultCache %s>' % self.dirname
+
+  # get_key(params): returns the digest of the run parameters.
+  # params is a list of (name, value) pairs.
+  def get_key(self, params):
+    h = sha1()
+    for (k,v) in params:
+      h.update('%s=%r\n' % (k,v))
+    return h.hexdigest()
+
+  @classmethod
+  def digest_file(klass, path):
+    h = sha1()
+    fp = file(path, 'rb')
+    while 1:
+      data = fp.read(65536)
+      if not data: break
+      h.update(data)
+    fp.close()
+    return h.hexdigest()
+
+  def get_closure(self, key, files):
+    h = sha1(key)
+    for (digest,path) in sorted(files):
+      h.update('%s %s\n' % (digest, path))
+    return h.hexdigest()
+
+  # lookup(key, format): returns a cached (report, warnings) or None.
+  # The indexes of the parameters are tried from the most recent one.
+  def lookup(self, key, format):
+    idxpaths = []
+    for name in os.listdir(self.dirname):
+      if name.startswith(key+'.') and name.endswith('.idx'):
+        path = os.path.join(self.dirname, name)
+        try:
+          idxpaths.append((os.stat(path).st_mtime, path))
+        except OSError:
+          pass
+    for (_,idxpath) in sorted(idxpaths, reverse=True):
+      try:
+        data = self.lookup_index(key, idxpath, format)
+      except (IOError, OSError, ValueError):
+        continue
+      if data is not None:
+        return data
+    return None
+
+  def lookup_index(self, key, idxpath, format):
+    fp = file(idxpath, 'rb')
+    files = []
+    for line in fp:
+      (digest,path) = line.rstrip('\n').split(' ', 1)
+      if self.digest_file(path) != digest:
+        fp.close()
+        return None
+      files.append((digest,path))
+    fp.close()
+    closure = self.get_closure(key, files)
+    path = os.path.join(self.dirname, closure+'.'+format)
+    msgpath = os.path.join(self.dirname, closure+'.msg')
+    try:
+      fp = file(path, 'rb')
+    except IOError:
+      # the report has been evicted.
+      os.remove(idxpath)
+      raise
+    data = fp.read()
+    fp.close()
+    fp = file(msgpath, 'rb')
+    messages = fp.read()
+    fp.close()
+    for x in (path, msgpath, idxpath):
+      os.utime(x, None)
+    if self.verbose:
+      print >>sys.stderr, 'cache hit: %r' % path
+    return (data, messages)
+
+  # store(key, paths, reports, messages): stores reports for every format.
+  # reports is a dictionary of format -> report.
+  def store(self, key, paths, reports, messages=''):
+    files = [ (self.digest_file(path), path) for path in sorted(paths) ]
+    closure = self.get_closure(key, files)
+    for (format,data) in reports.iteritems():
+      self.write(closure+'.'+format, data)
+    self.write(closure+'.msg', messages)
+    self.write(key+'.'+closure+'.idx',
+               ''.join( '%s %s\n' % (digest,path) for (digest,path) in files ))
+    self.evict()
+    return
+
+  def write(self, name, data):
+    path = os.path.join(self.dirname, name)
+    tmppath = '%s.%d.tmp' % (path, os.getpid())
+    fp = file(tmppath, 'wb')
+    fp.write(data)
+    fp.close()
+    os.rename(tmppath, path)
+    return
+
+  # evict(): removes the least recently used entries
+  # until the total size is within the limit.
+  def evict(self):
+    entries = []
+    total = 0
+    for name in os.listdir(self.dirname):
+      path = os.path.join(self.dirname, name)
+      try:
+        st = os.stat(path)
+      except OSError:
+        continue
+      entries.append((st.st_mtime, st.st_size, path))
+      total += st.st_size
+    entries.sort()
+    for (_,size,path) in entries:
+      if total <= self.maxsize: break
+      try:
+        os.remove(path)
+        if self.verbose:
+          print >>sys.stderr, 'cache evicted: %r' % path
+      except OSError:
+        pass
+      total -= size
+    return
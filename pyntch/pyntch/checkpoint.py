@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+##
+##  checkpoint.py
+##
+##  Saves and restores the whole analysis state so that
+##  a long-running TypeNode.run() can be resumed after a crash.
+##
+
+import sys, os, time, types, copy_reg
+try:
+  import cPickle as pickle
+except ImportError:
+  import pickle
+from pyntch.typenode import TypeNode, UndefinedTypeNode, BuiltinType
+from pyntch.expression import OptAttrRef, BinaryOp
+from pyntch.basic_types import BuiltinBasicType
+from pyntch.exception import ExceptionType
+from pyntch.aggregate_types import ListType, TupleType, FrozenSetType, DictType
+from pyntch.module import Interpreter
+from pyntch.klass import ClassType
+from pyntch.config import ErrorConfig
+
+class CheckpointError(Exception): pass
+
+
+# Bound methods (which are used as receivers everywhere)
+# are pickled as a pair of an object and a method name.
+def reduce_method(m):
+  return (getattr, (m.im_self, m.im_func.__name__))
+copy_reg.pickle(types.MethodType, reduce_method)
+
+
+##  Checkpoint
+##
+##  A checkpoint file consists of a root record followed by
+##  a flat sequence of node records. Every TypeNode is replaced
+##  by its node ID wherever it is referenced, so the typeflow graph
+##  is written one node at a time instead of being recursively
+##  traversed by the pickler.
+##
+class Checkpoint(object):
+
+  MAGIC = 'pyntch-checkpoint'
+
+  # Class-level states that are saved along with the graph.
+  REGISTRY = [
+    (TypeNode, 'nodes'),
+    (TypeNode, 'procs'),
+    (TypeNode, 'checks'),
+    (BuiltinType, 'TYPEOBJS'),
+    (BuiltinBasicType, 'OBJECTS'),
+    (UndefinedTypeNode, 'OBJECT'),
+    (ExceptionType, 'OBJECTS'),
+    (ListType, 'CACHE'),
+    (TupleType, 'CACHE'),
+    (FrozenSetType, 'CACHE'),
+    (DictType, 'CACHE'),
+    (OptAttrRef, 'RESOLVERS'),
+    (BinaryOp, 'OPERATORS'),
+    (ClassType, 'generation'),
+    (Interpreter, 'stub_path'),
+    (Interpreter, 'lines'),
+    (Interpreter, 'files'),
+    (Interpreter, 'PATH2MODULE'),
+    (Interpreter, 'BUILTIN_MODULE'),
+    (Interpreter, 'DEFAULT_NAMESPACE'),
+    (ErrorConfig, 'raise_uncertain'),
+    (ErrorConfig, 'ignore_none'),
+    (ErrorConfig, 'show_all_exceptions'),
+    (ErrorConfig, 'unfound_modules'),
+    ]
+
+  CLASSPATH = None
+
+  def __init__(self, path):
+    self.path = path
+    return
+
+  def __repr__(self):
+    return '<Checkpoint %s>' % self.path
+
+  # classpath(cls): returns the dotted name of a (possibly nested) class.
+  @classmethod
+  def classpath(klass, cls):
+    if not cls.__module__.startswith('pyntch'): return None
+    if klass.CLASSPATH is None or cls not in klass.CLASSPATH:
+      klass.CLASSPATH = {}
+      def rec(prefix, modname, obj):
+        for (name,value) in obj.__dict__.items():
+          if not isinstance(value, (type, types.ClassType)): continue
+          if value.__module__ != modname or value in klass.CLASSPATH: continue
+          klass.CLASSPATH[value] = prefix+name
+          rec(prefix+name+'.', modname, value)
+        return
+      for (modname,module) in sys.modules.items():
+        if module and (modname == 'pyntch' or modname.startswith('pyntch.')):
+          rec(modname+':', modname, module)
+    return klass.CLASSPATH.get(cls)
+
+  @classmethod
+  def findclass(klass, path):
+    (modname,name) = path.split(':')
+    obj = sys.modules[modname]
+    for x in name.split('.'):
+      obj = getattr(obj, x)
+    return obj
+
+  # save(extra): writes the current state.
+  def save(self, extra=None):
+    singletons = {}
+    for (cls,obj) in BuiltinType.TYPEOBJS.iteritems():
+      singletons[id(obj)] = ('t', self.classpath(cls))
+    for (cls,obj) in BuiltinBasicType.OBJECTS.iteritems():
+      singletons[id(obj)] = ('o', self.classpath(cls))
+    if UndefinedTypeNode.OBJECT:
+      singletons[id(UndefinedTypeNode.OBJECT)] = ('u', None)
+    pids = {}
+    queue = []
+    def persistent_id(obj):
+      if isinstance(obj, TypeNode):
+        try:
+          return pids[id(obj)]
+        except KeyError:
+          pass
+        (kind,path) = singletons.get(id(obj), ('n', None))
+        if kind == 'n':
+          path = self.classpath(obj.__class__)
+        pid = (kind, len(queue), path)
+        pids[id(obj)] = pid
+        queue.append(obj)
+        return pid
+      if isinstance(obj, (type, types.ClassType)):
+        path = self.classpath(obj)
+        if path and '.' in path.split(':')[1]:
+          # nested classes cannot be pickled by reference.
+          return ('c', None, path)
+      return None
+    tmppath = self.path+'.tmp'
+    fp = file(tmppath, 'wb')
+    pickler = pickle.Pickler(fp, pickle.HIGHEST_PROTOCOL)
+    pickler.persistent_id = persistent_id
+    pickler.dump(self.MAGIC)
+    root = [ (self.classpath(cls), name, getattr(cls, name)) for (cls,name) in self.REGISTRY ]
+    pickler.dump((root, extra))
+    i = 0
+    while i < len(queue):
+      pickler.dump(queue[i].__dict__)
+      i += 1
+    pickler.dump(None)
+    fp.close()
+    os.rename(tmppath, self.path)
+    return len(queue)
+
+  # load(): restores the state and returns the extra data given to save().
+  def load(self):
+    nodes = []
+    def persistent_load(pid):
+      (kind,i,path) = pid
+      if kind == 'c':
+        return self.findclass(path)
+      if i < len(nodes):
+        return nodes[i]
+      assert i == len(nodes), pid
+      if kind == 'u':
+        obj = UndefinedTypeNode.OBJECT
+        if obj is None:
+          obj = UndefinedTypeNode.__new__(UndefinedTypeNode)
+      else:
+        cls = self.findclass(path)
+        if kind == 't':
+          obj = BuiltinType.TYPEOBJS.get(cls)
+        elif kind == 'o':
+          obj = BuiltinBasicType.OBJECTS.get(cls)
+          cls = cls.TYPE_INSTANCE
+        else:
+          obj = None
+        if obj is None:
+          obj = cls.__new__(cls)
+      nodes.append(obj)
+      return obj
+    try:
+      fp = file(self.path, 'rb')
+    except IOError, e:
+      raise CheckpointError('cannot open: %s' % e)
+    unpickler = pickle.Unpickler(fp)
+    unpickler.persistent_load = persistent_load
+    if unpickler.load() != self.MAGIC:
+      raise CheckpointError('not a checkpoint: %s' % self.path)
+    (root, extra) = unpickler.load()
+    i = 0
+    while 1:
+      state = unpickler.load()
+      if state is None: break
+      obj = nodes[i]
+      obj.__dict__.clear()
+      obj.__dict__.update(state)
+      i += 1
+    fp.close()
+    for (path,name,value) in root:
+      setattr(self.findclass(path), name, value)
+    return extra
+
+
+##  Checkpointer
+##
+##  Periodically called from TypeNode.run().
+##
+class Checkpointer(object):
+
+  def __init__(self, path, interval, extra=None):
+    self.checkpoint = Checkpoint(path)
+    self.interval = interval
+    self.extra = extra
+    self.t0 = time.time()
+    return
+
+  def tick(self):
+    if time.time() < self.t0+self.interval: return
+    self.save()
+    return
+
+  def save(self):
+    t = time.time()
+    n = self.checkpoint.save(self.extra)
+    if TypeNode.verbose:
+      print >>sys.stderr, ('checkpoint: %d nodes saved to %r in %.2fsec' %
+                           (n, self.checkpoint.path, time.time()-t))
+    self.t0 = time.time()
+    return
@@ -14,6 +14,13 @@ class ErrorConfig(object):
   show_all_exceptions = False
 
   unfound_modules = set()
+
+  # settings that affect the result of analysis.
+  SETTINGS = ('raise_uncertain', 'ignore_none', 'show_all_exceptions')
+
+  @classmethod
+  def get_settings(klass):
+    return [ (k, getattr(klass, k)) for k in klass.SETTINGS ]
   
   @classmethod
   def module_not_found(klass, modname):
@@ -32,15 +39,15 @@ class ErrorConfig(object):
   
   @classmethod
   def NameUndefined(klass, name):
-    return NameErrorType.occur('undefined: %s' % name)
+    return NameErrorType.occur('undefined: %s', name)
 
   @classmethod
   def NotSupported(klass, name):
-    return RuntimeErrorType.occur('not supported feature: %s' % name)
+    return RuntimeErrorType.occur('not supported feature: %s', name)
   
   @classmethod
   def NotInstantiatable(klass, typename):
-    return TypeErrorType.occur('not instantiatable: %s' % typename)
+    return TypeErrorType.occur('not instantiatable: %s', typename)
   
   @classmethod
   def NoKeywordArgs(klass):
@@ -48,82 +55,82 @@ class ErrorConfig(object):
   
   @classmethod
   def NoKeywordArg1(klass, kwd):
-    return TypeErrorType.occur('cannot take keyword: %s' % kwd)
+    return TypeErrorType.occur('cannot take keyword: %s', kwd)
   
   @classmethod
   def InvalidKeywordArgs(klass, kwd):
-    return TypeErrorType.occur('invalid keyword argument: %s' % kwd)
+    return TypeErrorType.occur('invalid keyword argument: %s', kwd)
   
   @classmethod
   def InvalidNumOfArgs(klass, valid, nargs):
     if valid < nargs:
-      return TypeErrorType.occur('too many args: %r required, %r given' % (valid, nargs))
+      return TypeErrorType.occur('too many args: %r required, %r given', valid, nargs)
     else:
-      return TypeErrorType.occur('too few args: %r given, %r required' % (nargs, valid))
+      return TypeErrorType.occur('too few args: %r given, %r required', nargs, valid)
 
   @classmethod
   def NotConvertable(klass, typename):
-    return ValueErrorType.occur('not convertable to %s' % typename)
+    return ValueErrorType.occur('not convertable to %s', typename)
 
   @classmethod
   def NotCallable(klass, obj):
     if klass.is_ignored(obj): return None
-    return TypeErrorType.occur('not callable: %s' % obj)
+    return TypeErrorType.occur('not callable: %s', obj)
   
   @classmethod
   def NotIterable(klass, obj):
     if klass.is_ignored(obj): return None
-    return TypeErrorType.occur('not iterable: %s' % obj)
+    return TypeErrorType.occur('not iterable: %s', obj)
   
   @classmethod
   def NotSubscriptable(klass, obj):
     if klass.is_ignored(obj): return None
-    return TypeErrorType.occur('not subscriptable: %s' % obj)
+    return TypeErrorType.occur('not subscriptable: %s', obj)
   
   @classmethod
   def NotAssignable(klass, obj):
     if klass.is_ignored(obj): return None
-    return TypeErrorType.occur('cannot assign item: %s' % obj)
+    return TypeErrorType.occur('cannot assign item: %s', obj)
   
   @classmethod
   def NoLength(klass, obj):
     if klass.is_ignored(obj): return None
-    return TypeErrorType.occur('length not defined: %s' % obj)
+    return TypeErrorType.occur('length not defined: %s', obj)
   
   @classmethod
   def AttributeNotFound(klass, obj, attrname):
     if klass.is_ignored(obj): return None
-    return AttributeErrorType.occur('attribute not found: %s.%s' % (obj, attrname))
+    return AttributeErrorType.occur('attribute not found: %s.%s', obj, attrname)
   
   @classmethod
   def AttributeNotAssignable(klass, obj, attrname):
     if klass.is_ignored(obj): return None
-    return AttributeErrorType.occur('attribute cannot be assigned: %s.%s' % (obj, attrname))
+    return AttributeErrorType.occur('attribute cannot be assigned: %s.%s', obj, attrname)
   
   @classmethod
   def NotUnpackable(klass, obj):
     if klass.is_ignored(obj): return None
-    return ValueErrorType.occur('tuple cannot be unpacked: %s' % obj)
+    return ValueErrorType.occur('tuple cannot be unpacked: %s', obj)
   
   @classmethod
   def NotSupportedOperand(klass, op, left, right=None):
     if right:
       if klass.is_ignored(left) or klass.is_ignored(right): return None
-      return TypeErrorType.occur('not supported operand %s(%s, %s)' %
-                                 (op, left.get_type().typename(), right.get_type().typename()))
+      return TypeErrorType.occur('not supported operand %s(%s, %s)', op,
+                                 left.get_type().typename(), right.get_type().typename())
     else:
       if klass.is_ignored(left): return None
-      return TypeErrorType.occur('not supported operand %s(%s)' % (op, left.get_type().typename()))
+      return TypeErrorType.occur('not supported operand %s(%s)', op, left.get_type().typename())
 
   @classmethod
   def TypeCheckerError(klass, src, obj, validtype):
-    return TypeErrorType.occur('%s (%s) must be %s' % (src, obj, validtype))
+    return TypeErrorType.occur('%s (%s) must be %s', src, obj, validtype)
 
   # maybe
   @classmethod
   def MaybeNotConvertable(klass, typename):
     if not klass.raise_uncertain: return None
-    return ValueErrorType.maybe('not convertable to %s' % typename)
+    return ValueErrorType.maybe('not convertable to %s', typename)
   
   @classmethod
   def MaybeOutOfRange(klass):
@@ -15,13 +15,20 @@ from pyntch.klass import ClassType, InstanceObject
 ##
 class InternalException(InstanceObject):
 
-  def __init__(self, klass, message=None):
+  def __init__(self, klass, message=None, msgargs=()):
     self.message = message
+    self.msgargs = msgargs
     InstanceObject.__init__(self, klass)
     return
 
   def __repr__(self):
-    return '%s: %s' % (self.klass.typename(), self.message)
+    return '%s: %s' % (self.klass.typename(), self.get_message())
+
+  # get_message(): the message is formatted only when it is shown
+  # because its arguments can be large type nodes.
+  def get_message(self):
+    if not self.msgargs: return self.message
+    return self.message % self.msgargs
   
   def typename(self):
     return self.klass.typename()
@@ -44,13 +51,15 @@ class ExceptionType(ClassType):
       return self.InitMethod(self)
     return ClassType.get_attr(self, frame, anchor, name, write=write)
 
+  # occur(message, *msgargs): returns an exception object.
+  # Objects are shared by the format string and its arguments.
   @classmethod
-  def occur(klass, message):
-    k = (klass.get_typeobj(), message)
+  def occur(klass, message, *msgargs):
+    k = (klass.get_typeobj(), message, msgargs)
     if k in klass.OBJECTS:
       expt = klass.OBJECTS[k]
     else:
-      expt = InternalException(klass.get_typeobj(), message)
+      expt = InternalException(klass.get_typeobj(), message, msgargs)
       klass.OBJECTS[k] = expt
     return expt
   maybe = occur
@@ -24,89 +24,87 @@ class ExpressionNode(CompoundTypeNode):
 
 ##  MustBeDefinedNode
 ##
+##  A node that must get some value from its inputs.
+##  check_undefined() is scheduled whenever its inputs change.
+##
 class MustBeDefinedNode(ExpressionNode):
 
-  nodes = None
-  
-  def __init__(self, frame, anchor):
-    ExpressionNode.__init__(self, frame, anchor)
-    MustBeDefinedNode.nodes.append(self)
-    return
-
   def check_undefined(self):
     return
-  
-  @classmethod
-  def reset(klass):
-    klass.nodes = []
-    return
-  
-  @classmethod
-  def check(klass):
-    for node in klass.nodes:
-      node.check_undefined()
-    return
 
 
 ###  References
 ###
 
-##  AttrRef
+##  OptAttrRef
+##
+##  The attribute of every object that comes from a node is looked up
+##  only once for each (node, attribute name): the first reference
+##  becomes the resolver and later references with the same key
+##  just receive its value. Errors are still raised in the frame of
+##  each reference.
 ##
-class AttrRef(MustBeDefinedNode):
+class OptAttrRef(ExpressionNode):
+
+  RESOLVERS = {}
   
   def __init__(self, frame, anchor, target, attrname):
     self.target = target
     self.attrname = attrname
-    self.received = set()
-    MustBeDefinedNode.__init__(self, frame, anchor)
-    self.target.connect(self.recv_target)
+    ExpressionNode.__init__(self, frame, anchor)
+    if isinstance(target, OptAttrRef):
+      # chained references such as self.x.y share the resolver of self.x.
+      target = target.resolver
+    k = (target, attrname)
+    if k in self.RESOLVERS:
+      self.resolver = self.RESOLVERS[k]
+      self.resolver.add_site(self)
+    else:
+      self.resolver = self
+      self.RESOLVERS[k] = self
+      self.consumed = 0
+      self.missing = []
+      self.sites = [self]
+      target.connect(self.recv_target)
     return
 
   def __repr__(self):
     return '%r.%s' % (self.target, self.attrname)
 
+  def add_site(self, site):
+    self.sites.append(site)
+    for obj in self.missing:
+      site.raise_expt(ErrorConfig.AttributeNotFound(obj, self.attrname))
+    if self.consumed and isinstance(site, MustBeDefinedNode):
+      site.schedule_check(site.check_undefined)
+    self.connect(site.recv)
+    return
+
   def recv_target(self, src):
-    from pyntch.basic_types import NoneType
-    for obj in src:
-      if obj in self.received: continue
-      self.received.add(obj)
+    objs = src.get_types(self.consumed)
+    self.consumed += len(objs)
+    if not objs: return
+    for site in self.sites:
+      if isinstance(site, MustBeDefinedNode):
+        site.schedule_check(site.check_undefined)
+    for obj in objs:
       try:
         obj.get_attr(self.frame, self.anchor, self.attrname).connect(self.recv)
       except NodeAttrError:
-        self.raise_expt(ErrorConfig.AttributeNotFound(obj, self.attrname))
-    return
-
-  def check_undefined(self):
-    if not self.received: return
-    if self.types: return
-    self.raise_expt(ErrorConfig.AttributeNotFound(self.target, self.attrname))
+        self.missing.append(obj)
+        for site in self.sites:
+          site.raise_expt(ErrorConfig.AttributeNotFound(obj, self.attrname))
     return
 
 
-##  OptAttrRef
+##  AttrRef
 ##
-class OptAttrRef(ExpressionNode):
-  
-  def __init__(self, frame, anchor, target, attrname):
-    self.target = target
-    self.attrname = attrname
-    self.received = set()
-    ExpressionNode.__init__(self, frame, anchor)
-    self.target.connect(self.recv_target)
-    return
-
-  def __repr__(self):
-    return '%r.%s' % (self.target, self.attrname)
+class AttrRef(OptAttrRef, MustBeDefinedNode):
 
-  def recv_target(self, src):
-    for obj in src:
-      if obj in self.received: continue
-      self.received.add(obj)
-      try:
-        obj.get_attr(self.frame, self.anchor, self.attrname).connect(self.recv)
-      except NodeAttrError:
-        self.raise_expt(ErrorConfig.AttributeNotFound(obj, self.attrname))
+  def check_undefined(self):
+    if not self.resolver.consumed: return
+    if self.types: return
+    self.raise_expt(ErrorConfig.AttributeNotFound(self.target, self.attrname))
     return
 
 
@@ -116,7 +114,7 @@ class IterRef(ExpressionNode):
   
   def __init__(self, frame, anchor, target):
     self.target = target
-    self.received = set()
+    self.consumed = 0
     ExpressionNode.__init__(self, frame, anchor)
     self.target.connect(self.recv_target)
     return
@@ -125,9 +123,9 @@ class IterRef(ExpressionNode):
     return 'iter(%r)' % (self.target,)
 
   def recv_target(self, src):
-    for obj in src:
-      if obj in self.received: continue
-      self.received.add(obj)
+    objs = src.get_types(self.consumed)
+    self.consumed += len(objs)
+    for obj in objs:
       try:
         obj.get_iter(self.frame, self.anchor).connect(self.recv)
       except NodeTypeError:
@@ -142,7 +140,7 @@ class SubRef(ExpressionNode):
   def __init__(self, frame, anchor, target, subs):
     self.target = target
     self.subs = subs
-    self.received = set()
+    self.consumed = 0
     ExpressionNode.__init__(self, frame, anchor)
     self.target.connect(self.recv_target)
     return
@@ -151,9 +149,9 @@ class SubRef(ExpressionNode):
     return '%r[%s]' % (self.target, ':'.join(map(repr, self.subs)))
 
   def recv_target(self, src):
-    for obj in src:
-      if obj in self.received: continue
-      self.received.add(obj)
+    objs = src.get_types(self.consumed)
+    self.consumed += len(objs)
+    for obj in objs:
       try:
         obj.get_element(self.frame, self.anchor, self.subs).connect(self.recv)
       except NodeTypeError:
@@ -168,7 +166,7 @@ class SliceRef(ExpressionNode):
   def __init__(self, frame, anchor, target, subs):
     self.target = target
     self.subs = subs
-    self.received = set()
+    self.consumed = 0
     ExpressionNode.__init__(self, frame, anchor)
     self.target.connect(self.recv_target)
     return
@@ -177,9 +175,9 @@ class SliceRef(ExpressionNode):
     return '%r%r' % (self.target, self.subs)
 
   def recv_target(self, src):
-    for obj in src:
-      if obj in self.received: continue
-      self.received.add(obj)
+    objs = src.get_types(self.consumed)
+    self.consumed += len(objs)
+    for obj in objs:
       try:
         obj.get_slice(self.frame, self.anchor, self.subs).connect(self.recv)
       except NodeTypeError:
@@ -198,7 +196,7 @@ class AttrAssign(ExpressionNode):
     self.target = target
     self.attrname = attrname
     self.value = value
-    self.received = set()
+    self.consumed = 0
     ExpressionNode.__init__(self, frame, anchor)
     self.target.connect(self.recv_target)
     return
@@ -207,9 +205,9 @@ class AttrAssign(ExpressionNode):
     return 'assign(%r.%s, %r)' % (self.target, self.attrname, self.value)
 
   def recv_target(self, src):
-    for obj in src:
-      if obj in self.received: continue
-      self.received.add(obj)
+    objs = src.get_types(self.consumed)
+    self.consumed += len(objs)
+    for obj in objs:
       try:
         self.value.connect(obj.get_attr(self.frame, self.anchor, self.attrname, write=True).recv)
       except (NodeAttrError, NodeTypeError, NodeAssignError):
@@ -225,7 +223,7 @@ class SubAssign(ExpressionNode):
     self.target = target
     self.sub = sub
     self.value = value
-    self.received = set()
+    self.consumed = 0
     ExpressionNode.__init__(self, frame, anchor)
     self.target.connect(self.recv_target)
     return
@@ -234,9 +232,9 @@ class SubAssign(ExpressionNode):
     return 'assign(%r[%r], %r)' % (self.target, self.sub, self.value)
 
   def recv_target(self, src):
-    for obj in src:
-      if obj in self.received: continue
-      self.received.add(obj)
+    objs = src.get_types(self.consumed)
+    self.consumed += len(objs)
+    for obj in objs:
       try:
         self.value.connect(obj.get_element(self.frame, self.anchor, self.sub, write=True).recv)
       except NodeTypeError:
@@ -253,7 +251,7 @@ class SliceAssign(ExpressionNode):
   def __init__(self, frame, anchor, target, subs, value):
     self.target = target
     self.subs = subs
-    self.received = set()
+    self.consumed = 0
     ExpressionNode.__init__(self, frame, anchor)
     self.elemall = IterElement(frame, anchor, value)
     self.target.connect(self.recv_target)
@@ -263,9 +261,9 @@ class SliceAssign(ExpressionNode):
     return 'assign(%r%r, %r)' % (self.target, self.subs, self.target)
 
   def recv_target(self, src):
-    for obj in src:
-      if obj in self.received: continue
-      self.received.add(obj)
+    objs = src.get_types(self.consumed)
+    self.consumed += len(objs)
+    for obj in objs:
       try:
         seq = obj.get_slice(self.frame, self.anchor, self.subs, write=True)
         self.elemall.connect(seq.elemall.recv)
@@ -287,9 +285,11 @@ class FunCall(ExpressionNode):
     self.func = func
     self.args = tuple(args or ())
     self.kwargs = kwargs or {}
-    self.varargs = set([()])
-    self.received = set()
-    self.received_tuple = set()
+    # callees (a cursor of func) and star-argument shapes seen so far.
+    # Each new one is combined only with the existing ones of the other.
+    self.consumed = 0
+    self.varargs = [()]
+    self.consumed_tuple = 0
     assert isinstance(frame, ExecutionFrame)
     ExpressionNode.__init__(self, frame, anchor)
     func.connect(self.recv_func)
@@ -305,36 +305,44 @@ class FunCall(ExpressionNode):
             (self.func, ', '.join(map(repr, self.args) +
                                   [ '%s=%r' % (k,v) for (k,v) in self.kwargs.iteritems() ])))
 
-  def recv_func(self, _):
-    for obj in self.func:
-      for varargs in list(self.varargs):
-        k = (obj, varargs)
-        if k in self.received: continue
-        self.received.add(k)
-        try:
-          obj.call(self.frame, self.anchor, self.args+varargs, self.kwargs).connect(self.recv)
-        except NodeTypeError:
-          self.raise_expt(ErrorConfig.NotCallable(obj))
+  def call_func(self, obj, varargs):
+    try:
+      obj.call(self.frame, self.anchor, self.args+varargs, self.kwargs).connect(self.recv)
+    except NodeTypeError:
+      self.raise_expt(ErrorConfig.NotCallable(obj))
+    return
+
+  def recv_func(self, src):
+    objs = src.get_types(self.consumed)
+    self.consumed += len(objs)
+    for obj in objs:
+      for varargs in self.varargs:
+        self.call_func(obj, varargs)
+    return
+
+  def add_varargs(self, varargs):
+    if varargs in self.varargs: return
+    self.varargs.append(varargs)
+    for obj in self.func.get_types(0, self.consumed):
+      self.call_func(obj, varargs)
     return
 
   def recv_tuple(self, src):
     from pyntch.aggregate_types import TupleType
-    for obj in src:
-      if obj in self.received_tuple: continue
-      self.received_tuple.add(obj)
+    objs = src.get_types(self.consumed_tuple)
+    self.consumed_tuple += len(objs)
+    for obj in objs:
       if obj.is_type(TupleType.get_typeobj()):
         if obj.elements:
-          self.varargs.add(tuple(obj.elements))
+          self.add_varargs(tuple(obj.elements))
         else:
-          self.varargs.add((obj.elemall,))
+          self.add_varargs((obj.elemall,))
       else:
-        self.varargs.add((IterElement(self.frame, self.anchor, obj),))
-    self.recv_func(None)
+        self.add_varargs((IterElement(self.frame, self.anchor, obj),))
     return
 
   def recv_vararg(self, src):
-    self.varargs.add((src,))
-    self.recv_func(None)
+    self.add_varargs((src,))
     return
 
 
@@ -385,8 +393,12 @@ class BinaryOp(MustBeDefinedNode):
     self.op = op
     self.left = left
     self.right = right
-    self.received = set()
+    # cursors of the operand objects seen so far. Each new object
+    # is paired only with the objects already seen on the other side.
+    self.consumed_left = 0
+    self.consumed_right = 0
     self.computed = set()
+    self.unchecked = []
     self.tupleobj = self.listobj = None
     MustBeDefinedNode.__init__(self, frame, anchor)
     self.left.connect(self.recv_left)
@@ -397,54 +409,120 @@ class BinaryOp(MustBeDefinedNode):
     return '%s(%r,%r)' % (self.op, self.left, self.right)
 
   def recv_left(self, left):
-    for lobj in left:
-      for robj in self.right:
+    lobjs = left.get_types(self.consumed_left)
+    self.consumed_left += len(lobjs)
+    robjs = self.right.get_types(0, self.consumed_right)
+    for lobj in lobjs:
+      for robj in robjs:
         self.update_op(lobj, robj)
     return
   
   def recv_right(self, right):
-    for lobj in self.left:
-      for robj in right:
+    robjs = right.get_types(self.consumed_right)
+    self.consumed_right += len(robjs)
+    lobjs = self.left.get_types(0, self.consumed_left)
+    for robj in robjs:
+      for lobj in lobjs:
         self.update_op(lobj, robj)
     return
 
-  def update_op(self, lobj, robj):
-    from pyntch.basic_types import NumberType, IntType, BaseStringType, BUILTIN_OBJECT
-    from pyntch.aggregate_types import ListType, ListObject, TupleType
-    from pyntch.klass import InstanceObject
-    if (lobj,robj) in self.received: return
-    self.received.add((lobj,robj))
+  # OPERATORS: a process-wide table of the outcomes of
+  # builtin operations. (ltype, op, rtype) -> [action, uses]
+  OPERATORS = {}
+
+  @classmethod
+  def get_action(klass, op, lobj, robj):
+    from pyntch.basic_types import NumberType, IntType, BaseStringType
+    from pyntch.aggregate_types import ListType, TupleType
     # special handling for a formatting (%) operator
-    ltype = lobj.get_type()
-    rtype = robj.get_type()
-    if (lobj.is_type(BaseStringType.get_typeobj()) and
-        self.op == 'Mod'):
-      self.computed.add((lobj,robj))
-      lobj.connect(self.recv)
-      return
+    if (lobj.is_type(BaseStringType.get_typeobj()) and op == 'Mod'):
+      return ('left', None)
     # for numeric operation, the one with a higher rank is chosen.
     if (lobj.is_type(NumberType.get_typeobj()) and robj.is_type(NumberType.get_typeobj()) and
-        self.op in ('Add','Sub','Mul','Div','Mod','FloorDiv','Power','LeftShift','RightShift')):
-      self.computed.add((lobj,robj))
-      if ltype.get_rank() < rtype.get_rank():
-        robj.connect(self.recv)
+        op in ('Add','Sub','Mul','Div','Mod','FloorDiv','Power','LeftShift','RightShift')):
+      if lobj.get_type().get_rank() < robj.get_type().get_rank():
+        return ('right', None)
       else:
-        lobj.connect(self.recv)
-      return
+        return ('left', None)
     if (lobj.is_type(IntType.get_typeobj()) and robj.is_type(IntType.get_typeobj()) and
-        self.op in ('Bitand','Bitor','Bitxor')):
-      self.computed.add((lobj,robj))
-      robj.connect(self.recv)
-      return
+        op in ('Bitand','Bitor','Bitxor')):
+      return ('right', None)
     # for string operation, only Add is supported.
     if (lobj.is_type(BaseStringType.get_typeobj()) and robj.is_type(BaseStringType.get_typeobj()) and
-        self.op == 'Add'):
+        op == 'Add'):
+      return ('right', None)
+    # adding lists.
+    if (op == 'Add' and
+        (lobj.is_type(ListType.get_typeobj()) and robj.is_type(ListType.get_typeobj()))):
+      return ('list', None)
+    # multiplying a list by an integer.
+    if op == 'Mul':
+      if lobj.is_type(ListType.get_typeobj()) and robj.is_type(IntType.get_typeobj()):
+        return ('left', None)
+      elif lobj.is_type(IntType.get_typeobj()) and robj.is_type(ListType.get_typeobj()):
+        return ('right', None)
+    # adding tuples.
+    if (op == 'Add' and
+        (lobj.is_type(TupleType.get_typeobj()) and robj.is_type(TupleType.get_typeobj()))):
+      return ('tuple', None)
+    # multiplying a tuple by an integer.
+    if op == 'Mul':
+      if lobj.is_type(TupleType.get_typeobj()) and robj.is_type(IntType.get_typeobj()):
+        return ('left', None)
+      elif lobj.is_type(IntType.get_typeobj()) and robj.is_type(TupleType.get_typeobj()):
+        return ('right', None)
+    # other valid operations.
+    k = (lobj.get_type().typename(), op, robj.get_type().typename())
+    if k in klass.VALID_TYPES:
+      return ('object', klass.VALID_TYPES[k])
+    return ('dispatch', None)
+
+  # lookup_action: returns a memoized outcome for builtin operands.
+  # The outcome for instances depends on their class hierarchy
+  # and is not memoized.
+  @classmethod
+  def lookup_action(klass, op, lobj, robj):
+    from pyntch.klass import InstanceObject
+    if isinstance(lobj, InstanceObject) or isinstance(robj, InstanceObject):
+      return klass.get_action(op, lobj, robj)
+    k = (lobj.get_type(), op, robj.get_type())
+    try:
+      entry = klass.OPERATORS[k]
+    except KeyError:
+      entry = klass.OPERATORS[k] = [klass.get_action(op, lobj, robj), 0]
+    entry[1] += 1
+    return entry[0]
+
+  # get_operators: returns the list of builtin operations
+  # used so far as (ltype, op, rtype, action, uses).
+  @classmethod
+  def get_operators(klass):
+    r = []
+    for ((ltype,op,rtype),((action,arg),uses)) in klass.OPERATORS.iteritems():
+      if arg:
+        action = '%s %s' % (action, arg)
+      elif action == 'dispatch':
+        action = 'unsupported'
+      r.append((ltype.typename(), op, rtype.typename(), action, uses))
+    r.sort()
+    return r
+
+  def update_op(self, lobj, robj):
+    from pyntch.basic_types import BUILTIN_OBJECT
+    from pyntch.aggregate_types import ListType, TupleType
+    from pyntch.klass import InstanceObject
+    self.unchecked.append((lobj,robj))
+    self.schedule_check(self.check_undefined)
+    (action,arg) = self.lookup_action(self.op, lobj, robj)
+    if action == 'left':
+      self.computed.add((lobj,robj))
+      lobj.connect(self.recv)
+      return
+    if action == 'right':
       self.computed.add((lobj,robj))
       robj.connect(self.recv)
       return
-    # adding lists.
-    if (self.op == 'Add' and
-        (lobj.is_type(ListType.get_typeobj()) and robj.is_type(ListType.get_typeobj()))):
+    if action == 'list':
       if not self.listobj:
         self.listobj = ListType.create_list()
         self.listobj.connect(self.recv)
@@ -452,19 +530,7 @@ class BinaryOp(MustBeDefinedNode):
       lobj.connect_element(self.listobj)
       robj.connect_element(self.listobj)
       return
-    # multiplying a list by an integer.
-    if self.op == 'Mul':
-      if lobj.is_type(ListType.get_typeobj()) and robj.is_type(IntType.get_typeobj()):
-        self.computed.add((lobj,robj))
-        lobj.connect(self.recv)
-        return
-      elif lobj.is_type(IntType.get_typeobj()) and robj.is_type(ListType.get_typeobj()):
-        self.computed.add((lobj,robj))
-        robj.connect(self.recv)
-        return
-    # adding tuples.
-    if (self.op == 'Add' and
-        (lobj.is_type(TupleType.get_typeobj()) and robj.is_type(TupleType.get_typeobj()))):
+    if action == 'tuple':
       if not self.tupleobj:
         self.tupleobj = TupleType.create_tuple()
         self.tupleobj.connect(self.recv)
@@ -472,38 +538,38 @@ class BinaryOp(MustBeDefinedNode):
       lobj.connect_element(self.tupleobj)
       robj.connect_element(self.tupleobj)
       return
-    # multiplying a tuple by an integer.
-    if self.op == 'Mul':
-      if lobj.is_type(TupleType.get_typeobj()) and robj.is_type(IntType.get_typeobj()):
-        self.computed.add((lobj,robj))
-        lobj.connect(self.recv)
-        return
-      elif lobj.is_type(IntType.get_typeobj()) and robj.is_type(TupleType.get_typeobj()):
-        self.computed.add((lobj,robj))
-        robj.connect(self.recv)
-        return
-    # other valid operations.
-    k = (ltype.typename(), self.op, rtype.typename())
-    if k in self.VALID_TYPES:
+    if action == 'object':
       self.computed.add((lobj,robj))
-      BUILTIN_OBJECT[self.VALID_TYPES[k]].connect(self.recv)
+      BUILTIN_OBJECT[arg].connect(self.recv)
       return
     # Handle optional methods.
     if isinstance(lobj, InstanceObject):
       result = OptMethodCall(self.frame, self.anchor, lobj, self.LMETHOD[self.op], [robj])
-      result.connect(lambda src: self.recv_result(src, (lobj, robj)))
+      result.connect(self.ResultReceiver(self, (lobj, robj)))
     if isinstance(robj, InstanceObject):
       result = OptMethodCall(self.frame, self.anchor, robj, self.RMETHOD[self.op], [lobj])
-      result.connect(lambda src: self.recv_result(src, (lobj, robj)))
+      result.connect(self.ResultReceiver(self, (lobj, robj)))
     return
 
+  # ResultReceiver: a receiver that remembers the operands.
+  # (Not a lambda so that it can be saved in a checkpoint.)
+  class ResultReceiver(object):
+    
+    def __init__(self, binop, objs):
+      self.binop = binop
+      self.objs = objs
+      return
+
+    def __call__(self, src):
+      return self.binop.recv_result(src, self.objs)
+
   def recv_result(self, src, objs):
     self.computed.add(objs)
     return self.recv(src)
   
   def check_undefined(self):
-    if not self.received: return
-    for (lobj,robj) in self.received:
+    (unchecked, self.unchecked) = (self.unchecked, [])
+    for (lobj,robj) in unchecked:
       if (lobj,robj) not in self.computed:
         self.raise_expt(ErrorConfig.NotSupportedOperand(self.op, lobj, robj))
     return
@@ -547,7 +613,7 @@ class UnaryOp(MustBeDefinedNode):
   def __init__(self, frame, anchor, op, value):
     self.value = value
     self.op = op
-    self.received = set()
+    self.consumed = 0
     MustBeDefinedNode.__init__(self, frame, anchor)
     self.value.connect(self.recv_value)
     return
@@ -558,9 +624,9 @@ class UnaryOp(MustBeDefinedNode):
   def recv_value(self, src):
     from pyntch.basic_types import NumberType
     from pyntch.klass import InstanceObject
-    for obj in src:
-      if obj in self.received: continue
-      self.received.add(obj)
+    objs = src.get_types(self.consumed)
+    self.consumed += len(objs)
+    for obj in objs:
       if obj.is_type(NumberType.get_typeobj()):
         obj.connect(self.recv)
       elif isinstance(obj, InstanceObject):
@@ -588,7 +654,7 @@ class CompareOp(ExpressionNode):
     self.op = op
     self.left = left
     self.right = right
-    self.received = set()
+    self.consumed = 0
     ExpressionNode.__init__(self, frame, anchor)
     BoolType.get_object().connect(self.recv)
     if op not in ('is', 'is not'):
@@ -600,11 +666,15 @@ class CompareOp(ExpressionNode):
 
   def recv_left(self, left):
     from pyntch.klass import InstanceObject
-    for lobj in left:
-      if lobj in self.received: continue
-      self.received.add(lobj)
+    lobjs = left.get_types(self.consumed)
+    self.consumed += len(lobjs)
+    for lobj in lobjs:
       if isinstance(lobj, InstanceObject):
-        OptMethodCall(self.frame, self.anchor, lobj, self.LMETHOD[self.op], [self.right])
+        lobj.klass.watch_method(self.LMETHOD[self.op], self.call_method, lobj)
+    return
+
+  def call_method(self, lobj):
+    OptMethodCall(self.frame, self.anchor, lobj, self.LMETHOD[self.op], [self.right])
     return
 
 
@@ -680,10 +750,43 @@ def OptMethodCall(frame, anchor, target, name, args=None, kwargs=None):
 
 ##  IterElement
 ##
-def IterElement(frame0, anchor, target):
-  frame1 = ExceptionCatcher(frame0)
-  frame1.add_handler(StopIterationType.get_typeobj())
-  return MethodCall(frame1, anchor, IterRef(frame0, anchor, target), 'next')
+##  The elements of builtin iterators are connected directly.
+##  Other iterators (instances or generators) are handled by
+##  calling their next() method, catching StopIteration.
+##
+class IterElement(ExpressionNode):
+
+  def __init__(self, frame, anchor, target):
+    self.target = target
+    self.consumed = 0
+    self.iters = None
+    ExpressionNode.__init__(self, frame, anchor)
+    self.target.connect(self.recv_target)
+    return
+
+  def __repr__(self):
+    return '<call iter(%r).next()>' % (self.target,)
+
+  def recv_target(self, src):
+    from pyntch.aggregate_types import IterObject
+    objs = src.get_types(self.consumed)
+    self.consumed += len(objs)
+    for obj in objs:
+      try:
+        iterobj = obj.get_iter(self.frame, self.anchor)
+      except NodeTypeError:
+        self.raise_expt(ErrorConfig.NotIterable(obj))
+        continue
+      if iterobj.__class__ is IterObject:
+        iterobj.elemall.connect(self.recv)
+      else:
+        if self.iters is None:
+          self.iters = CompoundTypeNode()
+          frame1 = ExceptionCatcher(self.frame)
+          frame1.add_handler(StopIterationType.get_typeobj())
+          MethodCall(frame1, self.anchor, self.iters, 'next').connect(self.recv)
+        iterobj.connect(self.iters.recv)
+    return
 
 
 ##  IterDictValue
@@ -692,16 +795,16 @@ class IterDictValue(ExpressionNode):
 
   def __init__(self, frame, anchor, target):
     self.target = target
-    self.received = set()
+    self.consumed = 0
     ExpressionNode.__init__(self, frame, anchor)
     self.target.connect(self.recv_target)
     return
 
   def recv_target(self, src):
     from pyntch.aggregate_types import DictType
-    for obj in src:
-      if obj in self.received: continue
-      self.received.add(obj)
+    objs = src.get_types(self.consumed)
+    self.consumed += len(objs)
+    for obj in objs:
       if obj.is_type(DictType.get_typeobj()):
         MethodCall(self.frame, self.anchor, obj, 'iteritems').connect(self.recv)
       else:
@@ -717,7 +820,7 @@ class TupleUnpack(ExpressionNode):
     self.tupobj = tupobj
     self.elements = [ CompoundTypeNode() for _ in xrange(nelements) ]
     self.strict = strict
-    self.received = set()
+    self.consumed = 0
     ExpressionNode.__init__(self, frame, anchor)
     self.tupobj.connect(self.recv_tupobj)
     return
@@ -730,9 +833,9 @@ class TupleUnpack(ExpressionNode):
 
   def recv_tupobj(self, src):
     from pyntch.aggregate_types import TupleType
-    for obj in src:
-      if obj in self.received: continue
-      self.received.add(obj)
+    objs = src.get_types(self.consumed)
+    self.consumed += len(objs)
+    for obj in objs:
       if obj.is_type(TupleType.get_typeobj()) and obj.elements != None:
         # Unpack a fixed-length tuple.
         if (self.strict and len(obj.elements) != len(self.elements)) or len(obj.elements) < len(self.elements):
@@ -759,7 +862,7 @@ class TupleSlice(ExpressionNode):
       self.length = 0
     else:
       self.length = end-start+1
-    self.received = set()
+    self.consumed = 0
     ExpressionNode.__init__(self, frame, anchor)
     self.tupobj.connect(self.recv_tupobj)
     return
@@ -772,9 +875,9 @@ class TupleSlice(ExpressionNode):
 
   def recv_tupobj(self, src):
     from pyntch.aggregate_types import TupleType
-    for obj in src:
-      if obj in self.received: continue
-      self.received.add(obj)
+    objs = src.get_types(self.consumed)
+    self.consumed += len(objs)
+    for obj in objs:
       if obj.is_type(TupleType.get_typeobj()) and obj.elements != None:
         # Unpack a fixed-length tuple.
         if self.length:
@@ -1,20 +1,28 @@
 #!/usr/bin/env python
 import sys
-from pyntch.typenode import TypeNode, CompoundTypeNode, NodeTypeError, Element
+from pyntch.typenode import CompoundTypeNode, NodeTypeError, Element
 
 
 ##  TracebackObject
 ##
 ##  A TracebackObject is an exception object (or whatever is thrown)
 ##  associated with a specific execution frame.
+##  This is a plain (exptobj, frame) pair rather than a TypeNode.
+##  It is stored directly in the frames and compared by its value,
+##  so the same record is shared by every frame it reaches.
 ##
-class TracebackObject(TypeNode):
+class TracebackObject(tuple):
 
-  def __init__(self, exptobj, frame):
-    self.exptobj = exptobj
-    self.frame = frame
-    TypeNode.__init__(self, [self])
-    return
+  __slots__ = ()
+
+  def __new__(klass, exptobj, frame):
+    return tuple.__new__(klass, (exptobj, frame))
+
+  def __getnewargs__(self):
+    return tuple(self)
+
+  exptobj = property(lambda self: self[0])
+  frame = property(lambda self: self[1])
 
   def __repr__(self):
     try:
@@ -31,23 +39,42 @@ class TracebackObject(TypeNode):
 ##  method. Exceptions that are raised within this frame are
 ##  propagated to other ExecutionFrames which invoke the function.
 ##
+##  A frame that has a parent and does nothing but forwarding
+##  (i.e. a frame for an expression) does not hold exceptions by
+##  itself. Its exceptions are directly sent to the sink, the
+##  nearest enclosing frame that is either a function body or
+##  a try...except block. A TracebackObject still keeps the frame
+##  where it is raised.
+##
 class ExecutionFrame(CompoundTypeNode):
 
   expt_debug = 0
+  forward = True
 
+  # loc: the location of the frame, or the nearest one of its parents.
+  # top: the outermost frame (a function or module body).
   def __init__(self, parent, tree):
     self.parent = parent
-    self.raised = set()
     if tree:
       self.loc = (tree._module, tree.lineno)
+    elif parent:
+      self.loc = parent.loc
     else:
       self.loc = None
     CompoundTypeNode.__init__(self)
     if parent:
       assert isinstance(parent, ExecutionFrame), parent
-      if self.expt_debug:
-        print >>sys.stderr, 'connect_expt: %r <- %r' % (parent, self)
-      self.connect(parent.recv)
+      self.top = parent.top
+      if self.forward:
+        self.sink = parent.sink
+      else:
+        self.sink = self
+        if self.expt_debug:
+          print >>sys.stderr, 'connect_expt: %r <- %r' % (parent.sink, self)
+        self.connect(parent.sink.recv)
+    else:
+      self.sink = self
+      self.top = self
     return
 
   def __repr__(self):
@@ -64,63 +91,66 @@ class ExecutionFrame(CompoundTypeNode):
     return
 
   def getloc(self):
-    loc = None
+    return self.loc
+
+  # is_inside(frame): returns True if this frame is nested in the frame.
+  def is_inside(self, frame):
+    if frame.parent is None:
+      return self.top is frame
     while self:
-      loc = self.loc
-      if loc: break
+      if self is frame: return True
       self = self.parent
-    return loc
+    return False
+
+  # get_expts(): returns the exceptions raised within this frame
+  # and the ones propagated from other frames, in the order of location.
+  # Each of them is a list of (text, TracebackObject) and exceptions
+  # that are shown the same are listed only once.
+  def get_expts(self):
+    expts_here = {}
+    expts_there = {}
+    for expt in self:
+      if expt.frame.is_inside(self):
+        expts_here.setdefault(repr(expt), expt)
+      else:
+        expts_there.setdefault(repr(expt), expt)
+    key = lambda (s,expt): (expt.frame.loc, s)
+    return (sorted(expts_here.iteritems(), key=key),
+            sorted(expts_there.iteritems(), key=key))
   
   def raise_expt(self, expt):
     if not expt: return
     assert not isinstance(expt, CompoundTypeNode)
-    if expt in self.raised: return
-    self.raised.add(expt)
-    if self.expt_debug:
+    if self.sink.add_traceback(TracebackObject(expt, self)) and self.expt_debug:
       print >>sys.stderr, 'raise_expt: %r <- %r' % (self, expt)
-    TracebackObject(expt, self).connect(self.recv)
     return
 
+  # add_traceback(obj): stores a TracebackObject raised in this frame
+  # or one of its forwarding frames. Returns True if it is new.
+  def add_traceback(self, obj):
+    return self.update_type(obj)
+
   def showtxt(self, out):
     from pyntch.config import ErrorConfig
-    expts_here = []
-    expts_there = []
-    for expt in self:
-      frame = expt.frame
-      while frame:
-        if frame == self:
-          expts_here.append(expt)
-          break
-        frame = frame.parent
-      else:
-        expts_there.append(expt)
-    for expt in sorted(expts_here, key=lambda expt:expt.frame.getloc()):
-      out.write('raises %s' % expt)
+    (expts_here, expts_there) = self.get_expts()
+    for (s,_) in expts_here:
+      out.write('raises %s' % s)
     if ErrorConfig.show_all_exceptions:
-      for expt in sorted(expts_there, key=lambda expt:expt.frame.getloc()):
-        out.write('[raises %s]' % expt)
+      for (s,_) in expts_there:
+        out.write('[raises %s]' % s)
     return
 
   def showxml(self, out):
     from pyntch.config import ErrorConfig
-    expts_here = []
-    expts_there = []
-    for expt in self:
-      frame = expt.frame
-      while frame:
-        if frame == self:
-          expts_here.append(expt)
-          break
-        frame = frame.parent
-      else:
-        expts_there.append(expt)
-    for expt in sorted(expts_here, key=lambda expt:expt.frame.getloc()):
+    (expts_here, expts_there) = self.get_expts()
+    for (_,expt) in expts_here:
       (module, lineno) = expt.frame.getloc()
       obj = expt.exptobj
       out.show_xmltag('raise', type=obj.get_type().typename(), msg=str(obj),
                       loc='%s:%s' % (module.get_name(), lineno))
     if ErrorConfig.show_all_exceptions:
-      for expt in sorted(expts_there, key=lambda expt:expt.frame.getloc()):
+      for (_,expt) in expts_there:
+        (module, lineno) = expt.frame.getloc()
         obj = expt.exptobj
         out.show_xmltag('iraise', type=obj.get_type().typename(), msg=str(obj),
                         loc='%s:%s' % (module.get_name(), lineno))
@@ -137,13 +167,16 @@ class ExecutionFrame(CompoundTypeNode):
 ##
 class ExceptionCatcher(ExecutionFrame):
 
-  nodes = None
-  
+  forward = False
+
   def __init__(self, parent):
     self.handlers = []
     self.received = set()
+    self.unchecked = []
+    # matches: exception type -> handlers that catch it.
+    self.matches = {}
+    self.matches_generation = None
     ExecutionFrame.__init__(self, parent, None)
-    ExceptionCatcher.nodes.append(self)
     return
 
   def __repr__(self):
@@ -158,28 +191,56 @@ class ExceptionCatcher(ExecutionFrame):
   def add_handler(self, src):
     handler = ExceptionHandler(self, src)
     self.handlers.append(handler)
+    if handler.expt:
+      handler.expt.connect(self.recv_handler)
     return handler
 
-  @classmethod
-  def reset(klass):
-    klass.nodes = []
-    return
-  
-  @classmethod
-  def check(klass):
-    for node in klass.nodes:
-      node.check_expt()
-    return
-
   def recv(self, src):
     for obj in src:
-      assert isinstance(obj, TracebackObject), obj
-      self.received.add(obj)
+      self.add_traceback(obj)
+    return
+
+  def add_traceback(self, obj):
+    assert isinstance(obj, TracebackObject), obj
+    if obj in self.received: return False
+    self.received.add(obj)
+    self.unchecked.append(obj)
+    self.schedule_check(self.check_expt)
+    return True
+
+  # recv_handler: when the exceptions of a handler change,
+  # every exception received so far is checked again.
+  def recv_handler(self, _):
+    self.matches = {}
+    if self.received:
+      self.unchecked = list(self.received)
+      self.schedule_check(self.check_expt)
     return
 
+  # find_handlers(obj): returns the handlers that catch
+  # an exception object. The result only depends on the type
+  # of the object, so it is memoized per type (per class for
+  # instances) until the handlers or the class hierarchy change.
+  def find_handlers(self, obj):
+    from pyntch.klass import ClassType, InstanceObject
+    if self.matches_generation != ClassType.generation:
+      self.matches = {}
+      self.matches_generation = ClassType.generation
+    if isinstance(obj, InstanceObject):
+      k = obj.klass
+    else:
+      k = obj
+    if k in self.matches:
+      handlers = self.matches[k]
+    else:
+      handlers = [ frame for frame in self.handlers if frame.catches(obj) ]
+      self.matches[k] = handlers
+    return handlers
+
   def check_expt(self):
-    for obj in self.received:
-      for frame in self.handlers:
+    (unchecked, self.unchecked) = (self.unchecked, [])
+    for obj in unchecked:
+      for frame in self.find_handlers(obj.exptobj):
         if frame.handle_expt(obj.exptobj): break
       else:
         self.update_type(obj)
@@ -192,6 +253,8 @@ class ExceptionCatcher(ExecutionFrame):
 ##
 class ExceptionHandler(ExecutionFrame):
 
+  forward = False
+
   def __init__(self, parent, expt):
     self.received = set()
     self.reraise = False
@@ -222,18 +285,18 @@ class ExceptionHandler(ExecutionFrame):
     self.reraise = True
     return
 
-  def handle_expt(self, obj):
-    handled = True
-    if self.expt:
-      for typeobj in self.expt:
-        if obj.is_type(typeobj): break
-      else:
-        handled = False
-      if handled:
-        obj.connect(self.var.recv)
-        return not self.reraise
+  def catches(self, obj):
+    if not self.expt: return False
+    for typeobj in self.expt:
+      if obj.is_type(typeobj): return True
     return False
 
+  # handle_expt(obj): binds an exception that this handler catches
+  # and returns True unless it is re-raised.
+  def handle_expt(self, obj):
+    obj.connect(self.var.recv)
+    return not self.reraise
+
 
 ##  ExceptionMaker
 ##
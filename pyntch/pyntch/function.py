@@ -11,9 +11,15 @@ from pyntch.frame import ExecutionFrame
 # assign_arg(var1,arg1): Assign an argument to a local variable var1.
 def assign_arg(frame, anchor, var1, arg1):
   from pyntch.expression import TupleUnpack
+  from pyntch.aggregate_types import TupleObject
   assert not isinstance(var1, list), var1
   assert not isinstance(arg1, list), arg1
-  if isinstance(var1, tuple):
+  if (isinstance(var1, tuple) and isinstance(arg1, TupleObject) and
+      arg1.elements is not None and len(arg1.elements) == len(var1)):
+    # The shape of the tuple is known: connect the elements directly.
+    for (v,elem) in zip(var1, arg1.elements):
+      assign_arg(frame, anchor, v, elem)
+  elif isinstance(var1, tuple):
     tup = TupleUnpack(frame, anchor, arg1, len(var1))
     for (i,v) in enumerate(var1):
       assign_arg(frame, anchor, v, tup.get_nth(i))
@@ -156,7 +162,7 @@ class FuncType(BuiltinType, TreeReporter):
     # Remember where this is called from.
     self.frames.add(frame)
     # Propagate the exceptions upward.
-    self.frame.connect(frame.recv)
+    self.frame.connect(frame.sink.recv)
     return self.body
 
   def showtxt(self, out):
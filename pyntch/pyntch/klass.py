@@ -72,33 +72,37 @@ class BoundMethodType(BuiltinType):
 class ClassType(BuiltinType, TreeReporter):
 
   TYPE_NAME = 'class'
+
+  # generation: incremented whenever the ancestors of a class change.
+  generation = 0
   
   ##  ClassAttr
   ##
+  ##  An attribute defined in the class body, or an inherited one.
+  ##  An inherited attribute is a flattened view of the hierarchy:
+  ##  it is fed directly by the nearest classes that define the name
+  ##  on each path to the ancestors (and by the attribute nodes of
+  ##  the classes in between, which hold assigned values), instead
+  ##  of a chain of attributes created on every ancestor.
+  ##  The source nodes are maintained by the class (see get_sources).
+  ##
   class ClassAttr(CompoundTypeNode):
 
-    def __init__(self, frame, anchor, name, klass, klasses=None):
+    def __init__(self, frame, anchor, name, klass, inherited=False):
       self.frame = frame
       self.anchor = anchor
       self.name = name
       self.klass = klass
       self.processed = set()
       CompoundTypeNode.__init__(self)
-      if klasses:
-        klasses.connect(self.recv_klass)
+      if inherited:
+        for node in klass.get_sources(frame, anchor, name):
+          node.connect(self.recv)
       return
 
     def __repr__(self):
       return '%r.%s' % (self.klass, self.name)
 
-    def recv_klass(self, src):
-      for klass in src:
-        try:
-          klass.get_attr(self.frame, self.anchor, self.name).connect(self.recv)
-        except NodeAttrError:
-          pass
-      return
-
     def recv(self, src):
       from pyntch.function import FuncType
       from pyntch.basic_types import StaticMethodObject, ClassMethodObject
@@ -120,8 +124,18 @@ class ClassType(BuiltinType, TreeReporter):
     self.attrs = {}
     self.boundmethods = {}
     self.frames = set()
+    self.ancestors = set([self])
+    self.inherited = {}
+    self.sources = {}
+    self.sourceloc = None
+    self.defined = set()
+    self.opaque = set()
+    self.derived = []
+    self.watchers = {}
+    self.consumed = 0
     BuiltinType.__init__(self)
     self.klasses = CompoundTypeNode(bases+[self])
+    self.klasses.connect(self.recv_base)
     self.instance = InstanceObject(self)
     return
 
@@ -139,21 +153,150 @@ class ClassType(BuiltinType, TreeReporter):
     return self.name
   
   def is_subclass(self, klassobj):
-    if self is klassobj: return True
-    for klass in self.klasses:
-      if klass is not self and isinstance(klass, ClassType):
-        if klass.is_subclass(klassobj): return True
+    return klassobj in self.ancestors
+
+  # Class hierarchy index: the ancestors of each class and the names
+  # defined anywhere in its hierarchy are maintained as bases arrive
+  # and pushed down to the derived classes, so that subclass tests
+  # are a lookup and a special method that no class defines can be
+  # skipped without creating any node. Bases that are not Python
+  # classes (such as builtin types) cannot be enumerated, so they are
+  # kept aside and asked directly.
+  def recv_base(self, src):
+    klasses = src.get_types(self.consumed)
+    self.consumed += len(klasses)
+    for klass in klasses:
+      if klass is self: continue
+      if isinstance(klass, ClassType):
+        klass.derived.append(self)
+        self.update_index(klass.ancestors, klass.defined, klass.opaque)
+      else:
+        self.update_index((), (), [klass])
+      if self.sourceloc:
+        (frame,anchor) = self.sourceloc
+        for name in self.sources.keys():
+          self.add_sources(name, self.get_base_sources(klass, frame, anchor, name))
+    return
+
+  def update_index(self, ancestors, names, opaque):
+    ancestors = set(ancestors).difference(self.ancestors)
+    names = set(names).difference(self.defined)
+    opaque = set(opaque).difference(self.opaque)
+    if not ancestors and not names and not opaque: return
+    if ancestors:
+      ClassType.generation += 1
+    self.ancestors.update(ancestors)
+    self.defined.update(names)
+    self.opaque.update(opaque)
+    if names or opaque:
+      for name in self.watchers.keys():
+        if not self.is_defined(name): continue
+        for (func,arg) in self.watchers.pop(name):
+          func(arg)
+    for klass in self.derived:
+      klass.update_index(ancestors, names, opaque)
+    return
+
+  def is_defined(self, name):
+    if name in self.defined: return True
+    for klass in self.opaque:
+      try:
+        klass.get_attr(None, None, name)
+        return True
+      except NodeAttrError:
+        pass
     return False
 
+  # watch_method(name, func, arg): calls func(arg) once
+  # the method is defined somewhere in the class hierarchy.
+  def watch_method(self, name, func, arg):
+    if self.is_defined(name):
+      func(arg)
+    elif name in self.watchers:
+      self.watchers[name].append((func,arg))
+    else:
+      self.watchers[name] = [(func,arg)]
+    return
+
+  # get_sources(frame, anchor, name): returns the nodes that feed
+  # an inherited attribute. They are the sources of each base
+  # (see get_base_sources) and kept for every name that has been
+  # looked up, so that a new base or a new attribute node in the
+  # hierarchy only adds its own nodes (see add_sources).
+  # Most names are not found anywhere, so they share an empty tuple.
+  # The location of the first lookup is used when a base that arrives
+  # later is asked through its get_attr().
+  def get_sources(self, frame, anchor, name):
+    if name in self.sources:
+      return self.sources[name]
+    if not self.sourceloc:
+      self.sourceloc = (frame, anchor)
+    # the entry is made first, as the hierarchy might be cyclic.
+    self.sources[name] = ()
+    nodes = []
+    for klass in self.klasses.get_types(0, self.consumed):
+      if klass is self: continue
+      for node in self.get_base_sources(klass, frame, anchor, name):
+        if node not in nodes:
+          nodes.append(node)
+    if nodes:
+      for node in self.sources[name]:
+        if node not in nodes:
+          nodes.append(node)
+      self.sources[name] = nodes
+    return self.sources[name]
+
+  # get_base_sources(base, frame, anchor, name): the search stops
+  # at a class that defines the name in its body. Builtin bases and
+  # non-Python classes are asked through their own get_attr().
+  def get_base_sources(self, base, frame, anchor, name):
+    if not isinstance(base, PythonClassType):
+      try:
+        return [base.get_attr(frame, anchor, name)]
+      except NodeAttrError:
+        return []
+    nodes = []
+    if name in base.attrs:
+      nodes.append(base.attrs[name])
+      if name not in base.inherited: return nodes
+    nodes.extend(base.get_sources(frame, anchor, name))
+    return nodes
+
+  # add_sources(name, nodes): adds new source nodes of an attribute
+  # to this class and the derived classes that have looked it up.
+  def add_sources(self, name, nodes):
+    sources = self.sources[name]
+    nodes = [ node for node in nodes if node not in sources ]
+    if not nodes: return
+    if sources:
+      sources.extend(nodes)
+    else:
+      self.sources[name] = nodes
+    if name in self.inherited:
+      attr = self.inherited[name]
+      for node in nodes:
+        node.connect(attr.recv)
+    for klass in self.derived:
+      if name in klass.sources:
+        klass.add_sources(name, nodes)
+    return
+
   def get_attr(self, frame, anchor, name, write=False):
     if name == '__class__':
       if write: raise NodeAssignError(name)
       return self.get_type()
     elif name not in self.attrs:
-      attr = self.ClassAttr(frame, anchor, name, self, self.klasses)
+      attr = self.ClassAttr(frame, anchor, name, self, inherited=True)
       self.attrs[name] = attr
+      self.inherited[name] = attr
+      for klass in self.derived:
+        if name in klass.sources:
+          klass.add_sources(name, [attr])
     else:
       attr = self.attrs[name]
+    if write:
+      # an attribute assigned outside the class body.
+      self.update_index((), [name], ())
     return attr
 
   def bind_func(self, func):
@@ -193,6 +336,7 @@ class PythonClassType(ClassType, TreeReporter):
       attr = self.ClassAttr(parent_frame, anchor, name, self)
       var.connect(attr.recv)
       self.attrs[name] = attr
+    self.update_index((), self.attrs.iterkeys(), ())
     return
 
   def get_name(self):
@@ -297,8 +441,8 @@ class InstanceObject(BuiltinObject):
     self.attrs = {}
     self.boundmethods = {}
     BuiltinObject.__init__(self, klass)
-    for name in klass.attrs.iterkeys():
-      self.attrs[name] = self.InstanceAttr(None, None, name, self.klass, self)
+    # attributes are created by get_attr() when they are
+    # first read or assigned.
     return
   
   def __repr__(self):
@@ -325,6 +469,9 @@ class InstanceObject(BuiltinObject):
       self.attrs[name] = attr
     else:
       attr = self.attrs[name]
+    if write:
+      # a method might be assigned to the instance.
+      self.klass.update_index((), [name], ())
     return attr
 
   def get_iter(self, frame, anchor):
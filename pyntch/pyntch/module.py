@@ -226,6 +226,7 @@ class Interpreter(object):
   files = 0
   
   stub_path = None
+  TREES = {}
   PATH2MODULE = None
   BUILTIN_MODULE = None
   DEFAULT_NAMESPACE = None
@@ -274,6 +275,54 @@ class Interpreter(object):
           return path
     raise ModuleNotFound(name, modpath)
 
+  # parse_file(path)
+  #   return the number of lines and the syntax tree of a file.
+  #   Trees parsed in advance (e.g. by preparse) are reused.
+  @classmethod
+  def parse_file(klass, path):
+    if path in klass.TREES:
+      return klass.TREES.pop(path)
+    fp = file(path)
+    lines = 0
+    for _ in fp:
+      lines += 1
+    fp.close()
+    return (lines, compiler.parseFile(path))
+
+  # preparse(path, modpath)
+  #   parse a file and all the modules it imports (as far as they
+  #   can be found statically) and keep the trees for later use.
+  @classmethod
+  def preparse(klass, path, modpath):
+    path = os.path.normpath(path)
+    if path in klass.TREES or path in klass.PATH2MODULE: return
+    try:
+      klass.TREES[path] = klass.parse_file(path)
+    except (IOError, SyntaxError):
+      return
+    modpath = [os.path.dirname(path)] + modpath
+    names = set()
+    def rec(n):
+      if isinstance(n, compiler.ast.Import):
+        names.update( name for (name,_) in n.names )
+      elif isinstance(n, compiler.ast.From):
+        names.add(n.modname)
+      for c in n.getChildNodes():
+        rec(c)
+      return
+    rec(klass.TREES[path][1])
+    for fullname in names:
+      searchpath = modpath
+      for name in fullname.split('.'):
+        if not name or fullname in klass.BUILTIN_MODULE: break
+        try:
+          path1 = klass.find_module(name, searchpath)
+        except ModuleNotFound:
+          break
+        klass.preparse(path1, modpath)
+        searchpath = [os.path.dirname(path1)]
+    return
+
   # load_file
   @classmethod
   def load_file(klass, modname, path, modpath, level=0):
@@ -287,12 +336,9 @@ class Interpreter(object):
                                   level=level)
       klass.PATH2MODULE[path] = module
       try:
-        fp = file(path)
-        for _ in fp:
-          klass.lines += 1
-        fp.close()
+        (lines,tree) = klass.parse_file(path)
+        klass.lines += lines
         klass.files += 1
-        tree = compiler.parseFile(path)
       except IOError:
         raise ModuleNotFound(modname, path)
       def rec(n):
@@ -55,8 +55,15 @@ def build_assert(reporter, frame, space, tree, arg, evals):
 ##  build_assign(reporter, frame, namespace, node1, node2, evals)
 ##
 def build_assign(reporter, frame, space, n, v, evals):
+  from pyntch.aggregate_types import TupleObject
   if isinstance(n, ast.AssName) or isinstance(n, ast.Name):
     space[n.name].bind(v)
+  elif ((isinstance(n, ast.AssTuple) or isinstance(n, ast.AssList)) and
+        isinstance(v, TupleObject) and v.elements is not None and
+        len(v.elements) == len(n.nodes)):
+    # The shape of a tuple literal is known: connect the elements directly.
+    for (c,elem) in zip(n.nodes, v.elements):
+      build_assign(reporter, frame, space, c, elem, evals)
   elif isinstance(n, ast.AssTuple) or isinstance(n, ast.AssList):
     tup = TupleUnpack(ExecutionFrame(frame, n), n, v, len(n.nodes))
     for (i,c) in enumerate(n.nodes):
@@ -3,7 +3,8 @@
 ##  typenode.py
 ##
 
-import sys
+import sys, time
+from itertools import islice
 try:
   from xml.etree.cElementTree import Element
 except ImportError:
@@ -29,6 +30,15 @@ class TypeNode(object):
   nodes = 0
 
   procs = set()
+  checks = set()
+  checkpointer = None
+
+  # budgets: when one of them runs out, run() stops and
+  # the remaining procs are left pending.
+  deadline = None
+  max_propagations = None
+  propagations = 0
+  exhausted = None
 
   @classmethod
   def inc(klass):
@@ -39,25 +49,105 @@ class TypeNode(object):
   def schedule(klass, proc, obj):
     klass.procs.add((proc, obj))
     return
+
+  # schedule_check(proc): a check is performed when
+  # the propagation settles. Checks can cause further propagation,
+  # so both are repeated until nothing changes.
+  @classmethod
+  def schedule_check(klass, proc):
+    klass.checks.add(proc)
+    return
   
   @classmethod
-  def run(klass):
+  def set_budget(klass, seconds=None, propagations=None):
+    klass.deadline = None
+    if seconds is not None:
+      klass.deadline = time.time()+seconds
+    klass.max_propagations = propagations
+    klass.propagations = 0
+    klass.exhausted = None
+    return
+
+  # check_budget(): called before a proc is performed, so that
+  # a budget is only reported as exhausted when work is still queued.
+  @classmethod
+  def check_budget(klass):
+    if (klass.max_propagations is not None and
+        klass.max_propagations <= klass.propagations):
+      klass.exhausted = 'max-propagations'
+    elif (klass.deadline is not None and klass.propagations % 100 == 0 and
+          klass.deadline <= time.time()):
+      klass.exhausted = 'max-seconds'
+    return klass.exhausted
+
+  @classmethod
+  def run(klass, check=True):
+    while 1:
+      klass.propagate()
+      if not check or not klass.checks: break
+      (checks, klass.checks) = (klass.checks, set())
+      for proc in checks:
+        proc()
+      if klass.exhausted: break
+    return
+
+  @classmethod
+  def propagate(klass):
+    budgeted = (klass.deadline is not None or klass.max_propagations is not None)
     while klass.procs:
+      if klass.exhausted: break
+      if klass.checkpointer:
+        klass.checkpointer.tick()
       if klass.verbose:
         print >>sys.stderr, 'processing: %d nodes (%d left)' % (klass.nodes, len(klass.procs))
       (procs, klass.procs) = (klass.procs, set())
+      if not budgeted:
+        for (proc,obj) in procs:
+          proc(obj)
+        continue
       for (proc,obj) in procs:
+        if klass.exhausted or klass.check_budget():
+          klass.procs.add((proc,obj))
+          continue
         proc(obj)
+        klass.propagations += 1
     return
+
+  # get_pending(): returns the nodes that have not received
+  # their updates because a budget ran out.
+  @classmethod
+  def get_pending(klass):
+    nodes = set()
+    for (proc,_) in klass.procs:
+      nodes.add(getattr(proc, 'im_self', proc))
+    return nodes
+  
+  # types: the types of this node in the order they were added.
+  # A node without any type shares the empty tuple.
+  # A receiver that is connected to only one node can remember
+  # how many of them it has processed (a cursor) instead of
+  # keeping its own set of the received types.
+  types = ()
   
   def __init__(self, types):
-    self.types = set(types)
+    if types:
+      self.types = list(types)
     self.sendto = []
     TypeNode.inc()
     return
 
+  # Types can be added while iterating, so only
+  # the ones that exist at the beginning are returned.
   def __iter__(self):
-    return iter(list(self.types))
+    return islice(self.types, len(self.types))
+
+  def __contains__(self, obj):
+    return obj in self.types
+
+  # get_types(start, end): returns the types added
+  # between the cursors start and end.
+  def get_types(self, start, end=None):
+    return self.types[start:end]
 
   # connect(receiver): connects this node to
   # another node and designates that any data stored at
@@ -108,9 +198,12 @@ class SimpleTypeNode(TypeNode):
   def __init__(self, typeobj):
     assert isinstance(typeobj, TypeNode), typeobj
     self.typeobj = typeobj
-    TypeNode.__init__(self, [self])
+    TypeNode.__init__(self, None)
     return
 
+  # A SimpleTypeNode only holds itself.
+  types = property(lambda self: (self,))
+
   def __repr__(self):
     return '<%s>' % self.get_type().typename()
 
@@ -135,8 +228,13 @@ class SimpleTypeNode(TypeNode):
 ##
 class CompoundTypeNode(TypeNode):
 
+  # typeindex: a set of the types, which is only built
+  # for a node that has many types.
+  INDEX_SIZE = 8
+  typeindex = None
+
   def __init__(self, nodes=None):
-    TypeNode.__init__(self, [])
+    TypeNode.__init__(self, None)
     if nodes:
       for obj in nodes:
         obj.connect(self.recv)
@@ -150,11 +248,23 @@ class CompoundTypeNode(TypeNode):
       self.update_type(obj)
     return
   
+  def __contains__(self, obj):
+    if self.typeindex is not None:
+      return obj in self.typeindex
+    return obj in self.types
+
   def update_type(self, obj):
     assert not isinstance(obj, CompoundTypeNode)
-    if obj in self.types: return
+    if obj in self: return
     #print 'add', id(self), id(obj), obj
-    self.types.add(obj)
+    if self.types:
+      self.types.append(obj)
+    else:
+      self.types = [obj]
+    if self.typeindex is not None:
+      self.typeindex.add(obj)
+    elif self.INDEX_SIZE <= len(self.types):
+      self.typeindex = set(self.types)
     for receiver in self.sendto:
       self.schedule(receiver, self)
     return True
@@ -198,7 +308,7 @@ class UndefinedTypeNode(TypeNode):
     return klass.OBJECT
 
   def __init__(self, name=None):
-    TypeNode.__init__(self, [])
+    TypeNode.__init__(self, None)
     return
   
   def __repr__(self):
@@ -403,18 +513,26 @@ class BuiltinConstMethod(BuiltinConstCallable, BuiltinObject):
 class TypeChecker(CompoundTypeNode):
 
   ANY = 'any'
-  nodes = None
+
+  # INDEX: a set of valid types -> (acceptance of each type,
+  # valid type objects, description). Checkers that have the same
+  # valid types (e.g. the arguments of builtin functions) share
+  # the index. It is discarded when the class hierarchy changes.
+  INDEX = {}
+  INDEX_GENERATION = None
   
   def __init__(self, parent_frame, types, blame):
     self.parent_frame = parent_frame
     self.blame = blame
     self.received = set()
+    self.unchecked = []
     if types == self.ANY:
       self.validtypes = self.ANY
     else:
       self.validtypes = CompoundTypeNode(types)
     CompoundTypeNode.__init__(self)
-    TypeChecker.nodes.append(self)
+    if self.validtypes != self.ANY:
+      self.validtypes.connect(self.recv_validtypes)
     return
 
   def __repr__(self):
@@ -422,33 +540,54 @@ class TypeChecker(CompoundTypeNode):
             (','.join(map(repr, self.types)), self.validtypes))
 
   @classmethod
-  def reset(klass):
-    klass.nodes = []
-    return
-  
-  @classmethod
-  def check(klass):
-    for node in klass.nodes:
-      node.check_type()
-    return
+  def get_index(klass, validtypes):
+    from pyntch.basic_types import TypeType
+    from pyntch.klass import ClassType
+    if klass.INDEX_GENERATION != ClassType.generation:
+      klass.INDEX = {}
+      klass.INDEX_GENERATION = ClassType.generation
+    key = frozenset(validtypes.types)
+    if key not in klass.INDEX:
+      typeobjs = [ typeobj for typeobj in validtypes
+                   if typeobj.is_type(TypeType.get_typeobj()) ]
+      s = '|'.join(sorted( typeobj.typename() for typeobj in typeobjs ))
+      klass.INDEX[key] = ({}, typeobjs, s)
+    return klass.INDEX[key]
 
   def recv(self, src):
+    if self.validtypes == self.ANY: return
     for obj in src:
+      if obj in self.received: continue
       self.received.add(obj)
+      self.unchecked.append(obj)
+      self.schedule_check(self.check_type)
+    return
+
+  # recv_validtypes: when the valid types change,
+  # every object that has not been accepted is checked again.
+  def recv_validtypes(self, _):
+    if self.received:
+      self.unchecked = list(self.received)
+      self.schedule_check(self.check_type)
     return
 
   def check_type(self):
     from pyntch.config import ErrorConfig
-    from pyntch.basic_types import TypeType
-    if self.validtypes == self.ANY: return
-    for obj in self.received:
-      for typeobj in self.validtypes:
-        if typeobj.is_type(TypeType.get_typeobj()) and obj.is_type(typeobj):
-          self.update_type(obj)
-          break
+    (unchecked, self.unchecked) = (self.unchecked, [])
+    (accepted, typeobjs, s) = self.get_index(self.validtypes)
+    for obj in unchecked:
+      if obj in self: continue
+      # The result only depends on the type of an object
+      # except for type objects (classes, functions, etc.)
+      if isinstance(obj, BuiltinObject) and not isinstance(obj, BuiltinType):
+        k = obj.get_type()
+      else:
+        k = obj
+      if k not in accepted:
+        accepted[k] = obj.is_type(*typeobjs)
+      if accepted[k]:
+        self.update_type(obj)
       else:
-        s = '|'.join( typeobj.typename() for typeobj in self.validtypes
-                      if typeobj.is_type(TypeType.get_typeobj()) )
         self.parent_frame.raise_expt(ErrorConfig.TypeCheckerError(self.blame, obj, s))
     return
 
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+
+# Comparison methods defined outside of the class body.
+
+class A:
+  pass
+
+def eq(self, x):
+  return x+'a' # error: Add(int, str)
+
+A.__eq__ = eq
+
+class B(A):
+  pass
+
+def lt(self, x):
+  return x+1 # error: Add(str, int)
+
+def make_base():
+  class C(object):
+    __lt__ = lt
+  return C
+
+class D(make_base()):
+  pass
+
+# Comparison methods set on an instance.
+
+class E:
+  pass
+
+def eq2(x):
+  return x+'e' # error: Add(int, str)
+
+e = E()
+e.__eq__ = eq2
+
+class F:
+  def __init__(self):
+    self.__lt__ = lambda x: x+1 # error: Add(str, int)
+
+print A() == 1
+print B() == 2
+print D() < 'b'
+print e == 1
+print F() < 'f'
@@ -0,0 +1,10 @@
+#!/usr/bin/env python
+
+# Importing a module that cannot be found.
+import nonexistent_mod
+from nonexistent_pkg.sub import foo
+
+def f(x):
+  return nonexistent_mod.bar(x)
+
+print f(1)
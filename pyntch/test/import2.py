@@ -0,0 +1,6 @@
+#!/usr/bin/env python
+
+# A target that shares a module with the base (make batchcheck).
+import basic1
+
+print basic1.plus(1, 2)
@@ -2,25 +2,189 @@
 
 import sys, os, os.path, time
 import pyntch
-from pyntch.typenode import TypeNode, CompoundTypeNode, TypeChecker
-from pyntch.frame import ExecutionFrame, ExceptionCatcher
-from pyntch.expression import MustBeDefinedNode
+from pyntch.typenode import TypeNode, CompoundTypeNode
+from pyntch.frame import ExecutionFrame
+from pyntch.expression import BinaryOp
 from pyntch.namespace import Namespace
 from pyntch.module import Interpreter, IndentedStream, ModuleNotFound
 from pyntch.config import ErrorConfig
 
+# show
+def show(fp, modules, format):
+  strm = IndentedStream(fp)
+  if format == 'xml': strm.write('<output>')
+  if TypeNode.exhausted:
+    pending = {}
+    for node in TypeNode.get_pending():
+      name = repr(node)
+      pending[name] = pending.get(name, 0)+1
+    if format == 'xml':
+      strm.start_xmltag('incomplete', reason=TypeNode.exhausted,
+                        propagations=str(TypeNode.propagations))
+      for (name,n) in sorted(pending.iteritems()):
+        strm.show_xmltag('pending', node=name, count=str(n))
+      strm.end_xmltag('incomplete')
+    else:
+      strm.write('# INCOMPLETE: %s exceeded after %d propagations, %d nodes pending' %
+                 (TypeNode.exhausted, TypeNode.propagations, sum(pending.itervalues())))
+      strm.indent(+1)
+      for (name,n) in sorted(pending.iteritems()):
+        if n == 1:
+          strm.write('# pending: %s' % name)
+        else:
+          strm.write('# pending: %s (x%d)' % (name, n))
+      strm.indent(-1)
+      strm.write('')
+  for module in modules:
+    if format == 'xml':
+      module.showxml(strm)
+    else:
+      module.showtxt(strm)
+  if format == 'xml': strm.write('</output>')
+  return
+
+# load
+#   The warnings are also added to messages if given.
+def load(names, modpath, messages=None):
+  def warn(msg):
+    print >>sys.stderr, msg
+    if messages is not None:
+      messages.append(msg)
+    return
+  modules = []
+  for name in names:
+    try:
+      if name.endswith('.py'):
+        path = name
+        (name,_) = os.path.splitext(os.path.basename(name))
+        modules.append(Interpreter.load_file(name, path, modpath))
+      else:
+        modules.append(Interpreter.load_module(name, modpath)[-1])
+    except ModuleNotFound, e:
+      warn('module not found: %s' % name)
+  if ErrorConfig.unfound_modules:
+    warn('modules not found: %s' % ', '.join(sorted(ErrorConfig.unfound_modules)))
+  return modules
+
+# read_manifest
+#   A manifest is an INI-style file with one section per target:
+#
+#     [name]
+#     files = main.py lib/util.py    (entry files or module names)
+#     path = lib:../common           (optional module path)
+#     output = name.xml              (optional report file)
+#
+#   Relative paths are taken from the manifest's directory
+#   and made absolute.
+def read_manifest(fname):
+  from ConfigParser import SafeConfigParser
+  parser = SafeConfigParser()
+  if not parser.read(fname):
+    raise IOError('cannot read: %r' % fname)
+  basedir = os.path.dirname(fname)
+  def getpath(v):
+    return os.path.abspath(os.path.join(basedir, v))
+  targets = []
+  for name in parser.sections():
+    files = [ (x.endswith('.py') and getpath(x)) or x
+              for x in parser.get(name, 'files').split() ]
+    modpath = []
+    if parser.has_option(name, 'path'):
+      modpath = [ getpath(x) for x in parser.get(name, 'path').split(':') ]
+    output = None
+    if parser.has_option(name, 'output'):
+      output = getpath(parser.get(name, 'output'))
+    targets.append((name, files, modpath, output))
+  return targets
+
+# batch
+#   Analyze every target in a manifest in its own process.
+#   The files that are imported by the targets are parsed once
+#   beforehand and shared by the forked workers.
+#   When base modules are given, they are loaded and solved first
+#   and every worker extends the solved graph with its own target.
+#   All the paths are made absolute so that a module that is reached
+#   in different ways is loaded only once.
+def batch(targets, jobs, modpath, outdir, format, showall, verbose,
+          base=None, budget=(None,None)):
+  modpath = [ os.path.abspath(x) for x in modpath ]
+  if base:
+    base = [ (x.endswith('.py') and os.path.abspath(x)) or x for x in base ]
+  t = time.time()
+  for (_,files,path,_) in targets:
+    for name in files:
+      if name.endswith('.py'):
+        Interpreter.preparse(name, path+modpath)
+  if verbose:
+    print >>sys.stderr, ('batch: %d targets, %d files parsed in %.2fsec' %
+                         (len(targets), len(Interpreter.TREES), time.time()-t))
+  if base:
+    t = time.time()
+    load(base, modpath)
+    # the checks are deferred until each target is added.
+    TypeNode.run(check=False)
+    if verbose:
+      print >>sys.stderr, ('batch: %d base files, %d nodes solved in %.2fsec' %
+                           (Interpreter.files, TypeNode.nodes, time.time()-t))
+  def run_target(name, files, path, output):
+    TypeNode.set_budget(*budget)
+    modules = load(files, path+modpath)
+    TypeNode.run()
+    if showall:
+      modules = list(Interpreter.get_all_modules())
+    if not output:
+      output = os.path.join(outdir, name+'.'+format)
+    tmppath = '%s.%d.tmp' % (output, os.getpid())
+    fp = file(tmppath, 'w')
+    show(fp, modules, format)
+    fp.close()
+    os.rename(tmppath, output)
+    return 0
+  queue = list(targets)
+  running = {}
+  failed = []
+  while queue or running:
+    while queue and len(running) < jobs:
+      target = queue.pop(0)
+      pid = os.fork()
+      if pid == 0:
+        status = 1
+        try:
+          status = run_target(*target)
+        except Exception:
+          import traceback
+          traceback.print_exc()
+        os._exit(status)
+      running[pid] = (target[0], time.time())
+    (pid,status) = os.wait()
+    if pid not in running: continue
+    (name,t0) = running.pop(pid)
+    if status:
+      failed.append(name)
+    if verbose:
+      print >>sys.stderr, ('batch: %s %s in %.2fsec' %
+                           (name, status and 'failed' or 'done', time.time()-t0))
+  if failed:
+    print >>sys.stderr, 'batch: failed targets:', ', '.join(failed)
+    return 1
+  return 0
+
 # main
 def main(argv):
   import getopt
   def usage():
-    print 'usage: %s [-d] [-q] [-a] [-c config] [-C key=val] [-D] [-p pythonpath] [-P stubpath] [-o output] [-t format] [file ...]' % argv[0]
+    print ('usage: %s [-d] [-q] [-a] [-c config] [-C key=val] [-D] [-p pythonpath] [-P stubpath] [-o output] [-t format]'
+           ' [--checkpoint=file] [--checkpoint-interval=secs] [--resume]'
+           ' [--cache=dir] [--cache-size=mbytes] [--batch=manifest] [--jobs=n] [--base=modules]'
+           ' [--max-seconds=secs] [--max-propagations=n] [--operators] [file ...]' % argv[0])
     return 100
   try:
-    (opts, args) = getopt.getopt(argv[1:], 'dqac:CDp:P:o:t:')
+    (opts, args) = getopt.getopt(argv[1:], 'dqac:CDp:P:o:t:',
+                                 ['checkpoint=', 'checkpoint-interval=', 'resume',
+                                  'cache=', 'cache-size=', 'batch=', 'jobs=', 'base=',
+                                  'max-seconds=', 'max-propagations=', 'operators'])
   except getopt.GetoptError:
     return usage()
-  if not args:
-    return usage()
   stubdir = os.path.join(os.path.dirname(pyntch.__file__), 'stub')
   debug = 0
   defaultpath = True
@@ -30,6 +194,17 @@ def main(argv):
   modpath = []
   stubpath = [stubdir]
   output = None
+  checkpoint = None
+  interval = 60
+  resume = False
+  cachedir = None
+  cachesize = 100
+  manifest = None
+  jobs = 1
+  base = []
+  maxsecs = None
+  maxprops = None
+  operators = False
   for (k, v) in opts:
     if k == '-d': debug += 1
     elif k == '-q': verbose -= 1
@@ -46,51 +221,101 @@ def main(argv):
       if v.endswith('.xml'):
         format = 'xml'
     elif k == '-t': format = v
+    elif k == '--checkpoint': checkpoint = v
+    elif k == '--checkpoint-interval': interval = float(v)
+    elif k == '--resume': resume = True
+    elif k == '--cache': cachedir = v
+    elif k == '--cache-size': cachesize = float(v)
+    elif k == '--batch': manifest = v
+    elif k == '--jobs': jobs = int(v)
+    elif k == '--base': base.extend(v.split(','))
+    elif k == '--max-seconds': maxsecs = float(v)
+    elif k == '--max-propagations': maxprops = int(v)
+    elif k == '--operators': operators = True
+  if resume and not checkpoint:
+    return usage()
+  if not args and not resume and not manifest:
+    return usage()
   if defaultpath:
     modpath.extend(sys.path)
+  if manifest:
+    try:
+      targets = read_manifest(manifest)
+    except Exception, e:
+      print >>sys.stderr, 'invalid manifest: %s' % e
+      return 1
+    TypeNode.debug = debug
+    TypeNode.verbose = verbose
+    Interpreter.debug = debug
+    Interpreter.verbose = verbose
+    Interpreter.initialize(stubpath)
+    return batch(targets, jobs, modpath, output or '.', format, showall, verbose,
+                 base=base, budget=(maxsecs, maxprops))
+  outfp = sys.stdout
+  if output:
+    outfp = file(output, 'w')
+  cache = None
+  if cachedir and not resume:
+    from pyntch.cache import ResultCache
+    ResultCache.verbose = verbose
+    cache = ResultCache(cachedir, int(cachesize*1024*1024))
+    key = cache.get_key([('version', pyntch.__version__), ('cwd', os.getcwd()),
+                         ('args', args), ('showall', showall),
+                         ('modpath', modpath), ('stubpath', stubpath)] +
+                        ErrorConfig.get_settings())
+    data = cache.lookup(key, format)
+    if data is not None:
+      (report,messages) = data
+      sys.stderr.write(messages)
+      outfp.write(report)
+      return 0
   TypeNode.debug = debug
   TypeNode.verbose = verbose
   Interpreter.debug = debug
   Interpreter.verbose = verbose
   Interpreter.initialize(stubpath)
-  TypeChecker.reset()
-  MustBeDefinedNode.reset()
-  ExceptionCatcher.reset()
+  TypeNode.set_budget(maxsecs, maxprops)
   t = time.time()
-  modules = []
-  for name in args:
+  messages = []
+  if resume:
+    from pyntch.checkpoint import Checkpoint, CheckpointError
     try:
-      if name.endswith('.py'):
-        path = name
-        (name,_) = os.path.splitext(os.path.basename(name))
-        modules.append(Interpreter.load_file(name, path, modpath))
-      else:
-        modules.append(Interpreter.load_module(name, modpath)[-1])
-    except ModuleNotFound, e:
-      print >>sys.stderr, 'module not found:', name
-  if showall:
-    modules = Interpreter.get_all_modules()
-  if ErrorConfig.unfound_modules:
-    print >>sys.stderr, 'modules not found:', ', '.join(sorted(ErrorConfig.unfound_modules))
-  TypeNode.run()
-  TypeChecker.check()
-  MustBeDefinedNode.check()
-  ExceptionCatcher.check()
+      state = Checkpoint(checkpoint).load()
+    except CheckpointError, e:
+      print >>sys.stderr, e
+      return 1
+    if verbose:
+      print >>sys.stderr, 'resuming: %r' % checkpoint
+  else:
+    state = { 'modules': load(args, modpath, messages) }
+  if checkpoint:
+    from pyntch.checkpoint import Checkpointer
+    TypeNode.checkpointer = Checkpointer(checkpoint, interval, state)
   TypeNode.run()
+  modules = state['modules']
+  if showall:
+    modules = list(Interpreter.get_all_modules())
   if verbose:
     print >>sys.stderr, ('total files=%d, lines=%d in %.2fsec' %
                          (Interpreter.files, Interpreter.lines, time.time()-t))
-  outfp = sys.stdout
-  if output:
-    outfp = file(output, 'w')
-  strm = IndentedStream(outfp)
-  if format == 'xml': strm.write('<output>')
-  for module in modules:
-    if format == 'xml':
-      module.showxml(strm)
-    else:
-      module.showtxt(strm)
-  if format == 'xml': strm.write('</output>')
+  if operators:
+    for (ltype,op,rtype,action,uses) in BinaryOp.get_operators():
+      print >>sys.stderr, 'operator: %s %s %s -> %s (%d)' % (ltype, op, rtype, action, uses)
+  if TypeNode.exhausted:
+    print >>sys.stderr, ('incomplete: %s exceeded, %d nodes pending' %
+                         (TypeNode.exhausted, len(TypeNode.get_pending())))
+  if cache and not TypeNode.exhausted:
+    from cStringIO import StringIO
+    reports = {}
+    for fmt in ('txt', 'xml'):
+      fp = StringIO()
+      show(fp, modules, fmt)
+      reports[fmt] = fp.getvalue()
+    cache.store(key, Interpreter.PATH2MODULE.iterkeys(), reports,
+                ''.join( msg+'\n' for msg in messages ))
+    outfp.write(reports[format])
+  else:
+    show(outfp, modules, format)
   return 0
 
 if __name__ == '__main__': sys.exit(main(sys.argv))